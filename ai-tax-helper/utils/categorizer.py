@@ -1,7 +1,19 @@
+import os
+import sys
+
+# Share the compiled keyword matcher with the other services
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from insights.utils.categorizer import KeywordCategorizer  # type: ignore
+
+DEDUCTIBLE_KEYWORDS = {
+    "Deductible": ["travel", "uber", "flight", "office", "supplies"],
+}
+
+_CLASSIFIER = KeywordCategorizer(DEDUCTIBLE_KEYWORDS, "Not Deductible")
+
+
 def classify_expense(text):
-    text = text.lower()
-    if "travel" in text or "uber" in text or "flight" in text:
-        return "Deductible"
-    if "office" in text or "supplies" in text:
-        return "Deductible"
-    return "Not Deductible"
+    return _CLASSIFIER.categorize(text)
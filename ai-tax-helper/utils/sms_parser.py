@@ -1,11 +1,18 @@
-import re
+import os
+import sys
 
-def parse_sms(text):
-    amount = re.findall(r"Rs\s?(\d+)", text)
-    merchant = re.findall(r"at\s([A-Za-z]+)", text)
+# Read SMS with the parser shared by the other services
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from insights.utils import sms_parser  # type: ignore
 
+
+def parse_sms(text):
+    tx = sms_parser.parse_sms(text)
     return {
-        "merchant": merchant[0] if merchant else "Unknown",
-        "amount": float(amount[0]) if amount else 0.0,
+        "merchant": tx["merchant"] or "Unknown",
+        "amount": tx["amount"] or 0.0,
         "raw_text": text
     }
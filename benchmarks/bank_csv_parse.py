@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Bank CSV parsing: iterrows vs streaming
+=======================================
+Writes a synthetic statement (Date, Description, Amount) and parses it with
+the original pandas iterrows loop and the streaming csv generator. Each
+mode runs in its own process so peak RSS is reported per mode.
+
+    python benchmarks/bank_csv_parse.py [--rows 2000000] [--legacy-rows 100000]
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "insights"))
+
+MERCHANTS = ["Uber", "Zomato", "Amazon", "Swiggy", "BigBasket", "Netflix", "Apollo Pharmacy", "Electricity Board"]
+
+
+def write_statement(path: str, rows: int) -> None:
+    rnd = random.Random(42)
+    with open(path, "w") as f:
+        f.write("Date,Description,Amount\n")
+        for i in range(rows):
+            f.write(f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d},{rnd.choice(MERCHANTS)},{rnd.randint(10, 50000)}.{i % 100:02d}\n")
+
+
+def legacy_parse_bank_csv(path):
+    # the previous implementation, kept here for comparison
+    import pandas as pd
+    df = pd.read_csv(path)
+    transactions = []
+    for _, row in df.iterrows():
+        transactions.append({
+            "date": str(row.get("Date")),
+            "amount": float(row.get("Amount")),
+            "merchant": row.get("Description"),
+            "raw_text": str(row.to_dict())
+        })
+    return transactions
+
+
+def run_mode(mode: str, path: str, out) -> None:
+    from utils.parsers import iter_bank_csv
+    start = time.perf_counter()
+    total = 0.0
+    count = 0
+    if mode == "legacy iterrows":
+        for t in legacy_parse_bank_csv(path):
+            total += t["amount"]
+            count += 1
+    else:
+        for t in iter_bank_csv(path):
+            total += t["amount"]
+            count += 1
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    out.put((mode, count, elapsed, peak_mb))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--legacy-rows", type=int, default=100_000,
+                        help="iterrows is too slow for the full file; it runs on a smaller statement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        big = os.path.join(tmp, "statement.csv")
+        small = os.path.join(tmp, "statement_small.csv")
+        write_statement(big, args.rows)
+        write_statement(small, args.legacy_rows)
+        ctx = mp.get_context("spawn")
+        for mode, path in [("legacy iterrows", small), ("streaming csv", big)]:
+            out = ctx.Queue()
+            proc = ctx.Process(target=run_mode, args=(mode, path, out))
+            proc.start()
+            mode, count, elapsed, peak_mb = out.get()
+            proc.join()
+            print(f"{mode:<16} {count:>10,} rows {elapsed:>8.2f}s {count / elapsed:>12,.0f} rows/sec  peak RSS {peak_mb:>7.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
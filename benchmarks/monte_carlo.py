@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Digital Twin Monte Carlo latency
+================================
+Times the equity/gold Monte Carlo used by /api/digital-twin/simulate for
+10,000 paths x 360 months and checks it against a latency budget, both
+in-process and split across a process pool.
+
+    python benchmarks/monte_carlo.py [--paths 10000] [--months 360] [--budget-ms 1000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import main_backend  # noqa: E402
+
+
+def time_run(payload: dict, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        main_backend._simulate_monte_carlo(payload, 3000, 12, 6, payload["months"])
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paths", type=int, default=10000)
+    parser.add_argument("--months", type=int, default=360)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--budget-ms", type=float, default=1000.0)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    base = {"paths": args.paths, "months": args.months, "seed": 42}
+    results = {"in-process": time_run({**base, "workers": 1}, args.repeats)}
+    if args.workers > 1:
+        time_run({**base, "workers": args.workers}, 1)  # warm the pool
+        results[f"process pool ({args.workers} workers)"] = time_run({**base, "workers": args.workers}, args.repeats)
+
+    print(f"{args.paths:,} paths x {args.months} months, equity + gold (budget {args.budget_ms:.0f} ms)")
+    ok = True
+    for label, ms in results.items():
+        within = ms <= args.budget_ms
+        ok = ok and within
+        print(f"  {label:<28} {ms:>8.1f} ms  {'OK' if within else 'OVER BUDGET'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
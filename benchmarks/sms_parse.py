@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+SMS parsing: the unified parser and the entry points that delegate to it
+========================================================================
+Parses the same synthetic bank/UPI SMS corpus through utils.sms_parser and
+each service's adapter over it, reporting messages/sec plus how often an
+amount, a merchant and a date were read from the message itself. The
+per-field pattern searches are timed on their own as a profile of where
+the time goes.
+
+    python benchmarks/sms_parse.py [--messages 20000]
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "insights"))
+
+from utils import sms_parser  # noqa: E402
+from utils.dates import DATE_REGEX  # noqa: E402
+from utils.parsers import parse_upi_sms  # noqa: E402
+from utils.sms_parser import parse_many  # noqa: E402
+
+TEMPLATES = [
+    "ICICI Bank: Rs {amt} spent at {merchant} on {day}-{mon}",
+    "HDFC Bank: INR {amt}.50 debited from a/c XX{acct} on {day}/{mm}/24 for {merchant} via UPI. Ref {ref}",
+    "Rs.{amt} withdrawn at ATM on {day}-{mon}-2024 10:32. Avl bal Rs 12,450.00",
+    "Your a/c XX{acct} is debited with ₹{amt} on {day} {mon} 2024 at {merchant} using debit card",
+    "Paid Rs {amt} to {merchant} via UPI on 2024-{mm}-{day}. UPI Ref No {ref}",
+]
+MERCHANTS = ["Uber", "Zomato", "Amazon", "Swiggy", "Flipkart", "Netflix", "BigBasket", "Ola"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def make_corpus(n: int) -> list:
+    rnd = random.Random(42)
+    out = []
+    for _ in range(n):
+        m = rnd.randint(1, 12)
+        out.append(rnd.choice(TEMPLATES).format(
+            amt=rnd.randint(10, 20000), merchant=rnd.choice(MERCHANTS), day=f"{rnd.randint(1, 28):02d}",
+            mon=MONTHS[m - 1], mm=f"{m:02d}", acct=rnd.randint(1000, 9999), ref=rnd.randint(10**9, 10**10)))
+    return out
+
+
+def _load(name: str, relpath: str):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relpath))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def implementations():
+    tax = _load("tax_sms_parser", "ai-tax-helper/utils/sms_parser.py")
+    zero = _load("zero_click_sms_parser", "zero-click-budgeting/workers/parser/sms_parser.py")
+    return [
+        ("unified parse_many", parse_many),
+        ("parsers.parse_upi_sms", lambda texts: [parse_upi_sms(t) for t in texts]),
+        ("ai-tax-helper parse_sms", lambda texts: [tax.parse_sms(t) for t in texts]),
+        ("zero-click parse_sms", lambda texts: [zero.parse_sms(t) for t in texts]),
+    ]
+
+
+def field_searches():
+    return [
+        ("amount", lambda t: sms_parser.AMOUNT_REGEX.search(t)),
+        ("date", lambda t: DATE_REGEX.search(t)),
+        ("method (lowercased)", lambda t: sms_parser.METHOD_REGEX.search(t.lower())),
+        ("merchant", lambda t: sms_parser.MERCHANT_REGEX.search(t)),
+    ]
+
+
+def coverage(results: list, today: str) -> str:
+    n = len(results) or 1
+    amount = sum(1 for r in results if r.get("amount")) / n
+    merchant = sum(1 for r in results if r.get("merchant") not in (None, "Other", "Unknown")) / n
+    # a date equal to today means the parser fell back rather than reading one
+    date = sum(1 for r in results if r.get("date") not in (None, today)) / n
+    return f"amount {amount:4.0%}  merchant {merchant:4.0%}  date {date:4.0%}"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=20000)
+    args = ap.parse_args()
+
+    corpus = make_corpus(args.messages)
+    today = datetime.now().date().isoformat()
+    print(f"{args.messages} messages")
+    for name, fn in implementations():
+        start = time.perf_counter()
+        results = fn(corpus)
+        elapsed = time.perf_counter() - start
+        print(f"  {name:26s} {elapsed:7.3f}s  {args.messages / elapsed:>10,.0f} msg/s   {coverage(results, today)}")
+    print("per-field search")
+    for name, search in field_searches():
+        start = time.perf_counter()
+        for text in corpus:
+            search(text)
+        print(f"  {name:26s} {time.perf_counter() - start:7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+State snapshot save/load time
+=============================
+Fills BUDGET_TRANSACTIONS with synthetic webhook transactions spread over
+users and months, then times a full save, a save with nothing changed and
+a boot-time load, and checks the load against a latency budget. The load
+runs in a fresh process, as at boot, so freeing the filled stores is not
+counted.
+
+    python benchmarks/state_snapshot.py [--rows 2000000] [--users 1000] [--budget-ms 500]
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+MERCHANTS = ["Uber", "Zomato", "Amazon", "Swiggy", "BigBasket", "Netflix", "Apollo Pharmacy", "Electricity Board"]
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def boot_load(db_path: str, path: str, out) -> None:
+    os.environ["INSIGHTS_DB_PATH"] = db_path
+    import main_backend
+    load_ms = timed(main_backend.load_state_snapshot, path)
+    out.put((load_ms, len(main_backend.BUDGET_TRANSACTIONS)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--budget-ms", type=float, default=500.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # read at import time, so set before the import and never touch insights/data
+        os.environ["INSIGHTS_DB_PATH"] = os.path.join(tmp, "transactions.db")
+        import main_backend
+
+        rnd = random.Random(42)
+        for i in range(args.rows):
+            main_backend._record_budget_transaction(f"user-{i % args.users}", {
+                "amount": float(rnd.randint(10, 5000)), "merchant": rnd.choice(MERCHANTS),
+                "method": rnd.choice(["UPI", "Card", "SMS"]), "category": rnd.choice(["Food", "Travel", "Shopping"]),
+                "timestamp": f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}T10:{rnd.randint(0, 59):02d}:00",
+            })
+
+        path = os.path.join(tmp, "state.pickle")
+        save_ms = timed(main_backend.save_state_snapshot, path)
+        unchanged_ms = timed(main_backend.save_state_snapshot, path)
+        size_mb = os.path.getsize(path) / 1e6
+
+        ctx = mp.get_context("spawn")
+        out = ctx.Queue()
+        proc = ctx.Process(target=boot_load, args=(os.environ["INSIGHTS_DB_PATH"], path, out))
+        proc.start()
+        load_ms, loaded = out.get()
+        proc.join()
+        assert loaded == args.rows, (loaded, args.rows)
+
+    print(f"{args.rows:,} budget transactions, {args.users:,} users, snapshot {size_mb:.1f} MB")
+    print(f"  save                 {save_ms:>9.1f} ms")
+    print(f"  save (unchanged)     {unchanged_ms:>9.1f} ms")
+    within = load_ms <= args.budget_ms
+    print(f"  load                 {load_ms:>9.1f} ms  {'OK' if within else 'OVER BUDGET'} (budget {args.budget_ms:.0f} ms)")
+    sys.exit(0 if within else 1)
+
+
+if __name__ == "__main__":
+    main()
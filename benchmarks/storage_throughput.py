@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Insights storage insert throughput
+==================================
+Compares the original write path (one shared connection, rollback journal,
+commit per row) with WAL + group commit, using several producer threads
+writing into a fresh temporary database.
+
+    python benchmarks/storage_throughput.py [--threads 8] [--rows 500]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "insights"))
+
+from utils.storage import GroupCommitWriter, insert_transaction, migrate  # noqa: E402
+
+
+def sample_tx(i: int) -> dict:
+    return {"date": "2024-09-25", "amount": 100 + i % 900, "category": "Travel",
+            "merchant": "Uber", "raw_text": f"Rs {i} spent at Uber", "source": "sms"}
+
+
+def run_threads(threads: int, rows: int, work) -> float:
+    workers = [threading.Thread(target=work, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return threads * rows / (time.perf_counter() - start)
+
+
+def bench_baseline(path: str, threads: int, rows: int) -> float:
+    # the pre-WAL setup: shared connection, default journal, commit per insert
+    conn = sqlite3.connect(path, check_same_thread=False)
+    migrate(conn)
+    lock = threading.Lock()
+
+    def work(t):
+        for i in range(rows):
+            with lock:  # serialise cursor use on the shared connection
+                insert_transaction(conn, sample_tx(t * rows + i))
+
+    rate = run_threads(threads, rows, work)
+    conn.close()
+    return rate
+
+
+def bench_group_commit(path: str, threads: int, rows: int, synchronous: str) -> float:
+    writer = GroupCommitWriter(path, synchronous=synchronous)
+
+    def work(t):
+        for i in range(rows):
+            writer.insert(sample_tx(t * rows + i))
+
+    rate = run_threads(threads, rows, work)
+    writer.close()
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=500, help="inserts per thread")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {
+            "baseline (commit per row)": bench_baseline(os.path.join(tmp, "a.db"), args.threads, args.rows),
+            "WAL + group commit, synchronous=FULL": bench_group_commit(os.path.join(tmp, "b.db"), args.threads, args.rows, "FULL"),
+            "WAL + group commit, synchronous=NORMAL": bench_group_commit(os.path.join(tmp, "c.db"), args.threads, args.rows, "NORMAL"),
+        }
+    for label, rate in results.items():
+        print(f"{label:<42} {rate:>10,.0f} inserts/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Maintenance commands for the insights transaction database.
+
+Run from the insights directory, e.g.:
+
+    python manage.py migrate --db data/transactions.db
+    python manage.py backfill-rollup --db data/transactions.db
+    python manage.py recategorize --db data/transactions.db --workers 4
+"""
+import argparse
+import sqlite3
+import time
+
+from utils import storage
+from utils.recategorize import DEFAULT_BATCH_SIZE, recategorize_db
+
+
+def migrate(args):
+    conn = sqlite3.connect(args.db)
+    storage.configure_connection(conn)
+    applied = storage.migrate(conn, target=args.target, log=print)
+    version = max(storage.sqlite_migrations.applied_versions(conn), default=0)
+    print(f"{len(applied)} migration(s) applied; schema at version {version}")
+    conn.close()
+
+
+def backfill_rollup(args):
+    conn = storage.init_db(args.db)
+    start = time.perf_counter()
+    rows = storage.rebuild_monthly_rollup(conn)
+    print(f"monthly_rollup rebuilt: {rows} rows in {time.perf_counter() - start:.2f}s")
+    conn.close()
+
+
+def recategorize(args):
+    stats = recategorize_db(args.db, batch_size=args.batch_size, workers=args.workers)
+    print(f"recategorized {stats['rows']} rows ({stats['updated']} changed) in {stats['seconds']:.2f}s "
+          f"with {stats['workers']} worker(s): {stats['rows_per_sec']:.0f} rows/sec")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="insights database maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("migrate", help="apply pending schema migrations from migrations/")
+    p.add_argument("--db", default="data/transactions.db")
+    p.add_argument("--target", type=int, default=None, help="stop after this migration version")
+    p.set_defaults(func=migrate)
+
+    p = sub.add_parser("backfill-rollup", help="recompute monthly_rollup from the transactions table")
+    p.add_argument("--db", default="data/transactions.db")
+    p.set_defaults(func=backfill_rollup)
+
+    p = sub.add_parser("recategorize", help="re-run the keyword categorizer over every stored transaction")
+    p.add_argument("--db", default="data/transactions.db")
+    p.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    p.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    p.set_defaults(func=recategorize)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT,
+    amount REAL,
+    category TEXT,
+    merchant TEXT,
+    raw_text TEXT,
+    source TEXT,
+    user_id TEXT DEFAULT 'anonymous'
+);
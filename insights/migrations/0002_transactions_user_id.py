@@ -0,0 +1,8 @@
+"""Per-user storage: databases created before it lack the user_id column."""
+
+
+def upgrade(conn):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(transactions)")}
+    if "user_id" not in columns:
+        with conn:
+            conn.execute("ALTER TABLE transactions ADD COLUMN user_id TEXT DEFAULT 'anonymous'")
@@ -0,0 +1,10 @@
+"""Read-path indexes on transactions, each built online."""
+from sqlite_migrations import create_index_online
+
+
+def upgrade(conn):
+    # leads with date for range filters and also carries category/amount, so
+    # per-category monthly sums are answered from the index alone
+    create_index_online(conn, "idx_transactions_date", "transactions", ["date", "category", "amount"])
+    create_index_online(conn, "idx_transactions_merchant_date", "transactions", ["merchant", "date"])
+    create_index_online(conn, "idx_transactions_category_date", "transactions", ["category", "date"])
@@ -0,0 +1,35 @@
+-- Per-(user, month, category) totals kept in step with transactions by triggers,
+-- so every insert/update/delete path (including executemany and the group-commit
+-- writer) updates the rollup inside the same transaction as the row change.
+CREATE TABLE IF NOT EXISTS monthly_rollup (
+    user_id TEXT NOT NULL,
+    month TEXT NOT NULL,
+    category TEXT NOT NULL,
+    total REAL NOT NULL DEFAULT 0,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, month, category)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS trg_rollup_insert AFTER INSERT ON transactions BEGIN
+    INSERT INTO monthly_rollup (user_id, month, category, total, count)
+    VALUES (COALESCE(NEW.user_id, 'anonymous'), COALESCE(substr(NEW.date, 1, 7), ''), COALESCE(NEW.category, 'Uncategorized'), COALESCE(NEW.amount, 0), 1)
+    ON CONFLICT (user_id, month, category) DO UPDATE SET total = total + excluded.total, count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_rollup_delete AFTER DELETE ON transactions BEGIN
+    UPDATE monthly_rollup SET total = total - COALESCE(OLD.amount, 0), count = count - 1
+    WHERE user_id = COALESCE(OLD.user_id, 'anonymous') AND month = COALESCE(substr(OLD.date, 1, 7), '') AND category = COALESCE(OLD.category, 'Uncategorized');
+    DELETE FROM monthly_rollup WHERE count <= 0;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_rollup_update AFTER UPDATE OF date, amount, category, user_id ON transactions BEGIN
+    UPDATE monthly_rollup SET total = total - COALESCE(OLD.amount, 0), count = count - 1
+    WHERE user_id = COALESCE(OLD.user_id, 'anonymous') AND month = COALESCE(substr(OLD.date, 1, 7), '') AND category = COALESCE(OLD.category, 'Uncategorized');
+    INSERT INTO monthly_rollup (user_id, month, category, total, count)
+    VALUES (COALESCE(NEW.user_id, 'anonymous'), COALESCE(substr(NEW.date, 1, 7), ''), COALESCE(NEW.category, 'Uncategorized'), COALESCE(NEW.amount, 0), 1)
+    ON CONFLICT (user_id, month, category) DO UPDATE SET total = total + excluded.total, count = count + 1;
+    DELETE FROM monthly_rollup WHERE count <= 0;
+END;
+-- derive the rollup from rows stored before it existed
+DELETE FROM monthly_rollup;
+INSERT INTO monthly_rollup (user_id, month, category, total, count)
+SELECT COALESCE(user_id, 'anonymous'), COALESCE(substr(date, 1, 7), ''), COALESCE(category, 'Uncategorized'),
+       SUM(COALESCE(amount, 0)), COUNT(*)
+FROM transactions GROUP BY 1, 2, 3;
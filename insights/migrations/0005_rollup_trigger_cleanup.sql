@@ -0,0 +1,19 @@
+-- Only the rollup row the changed transaction came from can drop to zero, so
+-- clean up that key instead of scanning the whole rollup on every row change
+DROP TRIGGER IF EXISTS trg_rollup_delete;
+CREATE TRIGGER trg_rollup_delete AFTER DELETE ON transactions BEGIN
+    UPDATE monthly_rollup SET total = total - COALESCE(OLD.amount, 0), count = count - 1
+    WHERE user_id = COALESCE(OLD.user_id, 'anonymous') AND month = COALESCE(substr(OLD.date, 1, 7), '') AND category = COALESCE(OLD.category, 'Uncategorized');
+    DELETE FROM monthly_rollup
+    WHERE user_id = COALESCE(OLD.user_id, 'anonymous') AND month = COALESCE(substr(OLD.date, 1, 7), '') AND category = COALESCE(OLD.category, 'Uncategorized') AND count <= 0;
+END;
+DROP TRIGGER IF EXISTS trg_rollup_update;
+CREATE TRIGGER trg_rollup_update AFTER UPDATE OF date, amount, category, user_id ON transactions BEGIN
+    UPDATE monthly_rollup SET total = total - COALESCE(OLD.amount, 0), count = count - 1
+    WHERE user_id = COALESCE(OLD.user_id, 'anonymous') AND month = COALESCE(substr(OLD.date, 1, 7), '') AND category = COALESCE(OLD.category, 'Uncategorized');
+    DELETE FROM monthly_rollup
+    WHERE user_id = COALESCE(OLD.user_id, 'anonymous') AND month = COALESCE(substr(OLD.date, 1, 7), '') AND category = COALESCE(OLD.category, 'Uncategorized') AND count <= 0;
+    INSERT INTO monthly_rollup (user_id, month, category, total, count)
+    VALUES (COALESCE(NEW.user_id, 'anonymous'), COALESCE(substr(NEW.date, 1, 7), ''), COALESCE(NEW.category, 'Uncategorized'), COALESCE(NEW.amount, 0), 1)
+    ON CONFLICT (user_id, month, category) DO UPDATE SET total = total + excluded.total, count = count + 1;
+END;
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# the insights service runs from its own directory and imports utils.* from there
+INSIGHTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if INSIGHTS_DIR not in sys.path:
+    sys.path.insert(0, INSIGHTS_DIR)
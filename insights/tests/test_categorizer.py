@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+from utils.categorizer import MerchantCategoryCache, categorize_transaction
+
+
+def test_category_reads_the_text_not_just_the_cached_merchant():
+    assert categorize_transaction('', 'Amazon') == 'Shopping'
+    assert categorize_transaction('Rs 299 paid for Amazon Prime renewal', 'Amazon') == 'Subscriptions'
+    assert categorize_transaction('Rs 1299 spent at Amazon', 'Amazon') == 'Shopping'
+
+
+def test_merchant_cache_counts_hits_and_misses_and_evicts_the_least_recent():
+    cache = MerchantCategoryCache(maxsize=2)
+    assert cache.lookup(' Zomato ', lambda: 'Food') == 'Food'
+    assert cache.lookup('zomato', lambda: 'wrong') == 'Food'
+    cache.put('Uber', 'Travel')
+    cache.get('ZOMATO')
+    cache.put('Netflix', 'Subscriptions')  # Uber was used least recently
+    assert cache.get('uber') is None and cache.get('netflix') == 'Subscriptions'
+    assert cache.lookup('Unknown', lambda: 'Other') == 'Other' and len(cache) == 2
+    assert {k: cache.stats()[k] for k in ('hits', 'misses', 'size')} == {'hits': 3, 'misses': 2, 'size': 2}
+
+
+def test_merchant_cache_warm_keeps_the_most_recent_pairs():
+    cache = MerchantCategoryCache(maxsize=2)
+    assert cache.warm([('a', 'Food'), ('b', 'Travel'), ('c', 'Bills')]) == 2
+    assert (cache.get('a'), cache.get('c')) == (None, 'Bills')
+
+
+def test_tax_helper_categorizer_imports_no_storage():
+    tax_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'ai-tax-helper')
+    code = ("import sys; from utils.categorizer import classify_expense; "
+            "print(classify_expense('Uber to the office'), "
+            "any(m.endswith('storage') or m == 'sqlite_migrations' for m in sys.modules))")
+    out = subprocess.run([sys.executable, '-c', code], cwd=tax_dir, capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ['Deductible', 'False']
@@ -0,0 +1,21 @@
+from datetime import date
+
+from utils.dates import date_path_stats, extract_date
+
+
+def test_handles_bank_formats_without_dateutil():
+    ref = date(2024, 6, 1)
+    cases = {
+        'Rs 500 spent on 2024-09-25 10:32': date(2024, 9, 25),
+        'debited 25-Sep via UPI': date(2024, 9, 25),
+        'on 25th Sep 2024': date(2024, 9, 25),
+        'txn dt 05/09/24': date(2024, 9, 5),
+        'value date 25.09.2024': date(2024, 9, 25),
+        'paid Sep 25, 2023 at 9:15 pm': date(2023, 9, 25),
+    }
+    before = date_path_stats().get('dateutil', 0)
+    for text, expected in cases.items():
+        assert extract_date(text, ref) == expected, text
+    assert date_path_stats().get('dateutil', 0) == before
+    # an amount is not a year, and no date means no fuzzy parse
+    assert extract_date('Rs 500 debited from a/c XX1234', ref) is None
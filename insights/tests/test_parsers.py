@@ -0,0 +1,30 @@
+import io
+
+import pytest
+
+from utils.parsers import iter_bank_csv, parse_bank_csv
+
+
+def test_bank_csv_skips_rows_without_a_numeric_amount(tmp_path):
+    path = tmp_path / 'statement.csv'
+    path.write_text('Date , Description,Amount\n'
+                    '2024-09-01,Zomato,"1,250.50"\n'
+                    '2024-09-02,Opening balance,n/a\n'
+                    '2024-09-03,Short row\n'
+                    '2024-09-04,Uber,99\n')
+    # raw_text is the row's fields joined with commas (no longer a dict repr), unquoted
+    assert parse_bank_csv(str(path)) == [
+        {'date': '2024-09-01', 'amount': 1250.5, 'merchant': 'Zomato', 'raw_text': '2024-09-01,Zomato,1,250.50'},
+        {'date': '2024-09-04', 'amount': 99.0, 'merchant': 'Uber', 'raw_text': '2024-09-04,Uber,99'},
+    ]
+
+
+def test_iter_bank_csv_reads_uploads_and_fills_missing_columns():
+    upload = io.BytesIO(b'Amount,Description\n500,Swiggy\n')
+    assert list(iter_bank_csv(upload)) == [
+        {'date': 'None', 'amount': 500.0, 'merchant': 'Swiggy', 'raw_text': '500,Swiggy'}]
+    assert not upload.closed
+    assert list(iter_bank_csv(io.StringIO('Date,Amount\n2024-01-02,7\n')))[0]['merchant'] is None
+    assert list(iter_bank_csv(io.StringIO(''))) == []
+    with pytest.raises(ValueError):
+        list(iter_bank_csv(io.StringIO('Date,Description\n2024-01-02,Uber\n')))
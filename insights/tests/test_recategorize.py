@@ -0,0 +1,27 @@
+import os
+
+from utils import storage
+from utils.categorizer import categorize_batch
+from utils.recategorize import recategorize_db
+
+
+def test_categorize_batch_returns_only_changed_rows():
+    rows = [(1, 'Zomato', 'Rs 250 at Zomato', 'Food'), (2, 'Zomato', 'Rs 250 at Zomato', 'Misc'),
+            (3, None, None, 'Travel')]
+    assert categorize_batch(rows) == [('Food', 2), ('Other', 3)]
+
+
+def test_recategorize_db_rewrites_stale_categories_across_batches(tmp_path):
+    db = str(tmp_path / 'recat.db')
+    conn = storage.init_db(db)
+    storage.insert_transactions(conn, [
+        {'date': '2024-01-0%d' % (i + 1), 'amount': 10, 'category': 'Misc', 'merchant': 'Uber',
+         'raw_text': 'Rs 10 at Uber', 'user_id': 'u1'} for i in range(5)])
+    conn.close()
+    stats = recategorize_db(db, batch_size=2, workers=10 ** 6, commit_every=2)
+    assert (stats['rows'], stats['updated'], stats['batches']) == (5, 5, 3)
+    assert stats['workers'] == os.cpu_count()
+    conn = storage.init_db(db)
+    assert conn.execute('SELECT DISTINCT category FROM transactions').fetchall() == [('Travel',)]
+    assert storage.rollup_category_totals(conn, 2024, 1, 'u1') == {'Travel': 50.0}
+    assert recategorize_db(db, batch_size=2, workers=1)['updated'] == 0
@@ -0,0 +1,25 @@
+from datetime import date
+
+from utils.parsers import parse_upi_sms
+from utils.sms_parser import parse_sms
+
+
+def test_ignores_embedded_currency_and_non_merchant_words():
+    sms = parse_sms('Dear customer, hours 12 left. INR 300 paid to Zomato')
+    assert (sms['amount'], sms['merchant']) == (300.0, 'Zomato')
+    assert parse_sms('Payment of Rs 450 at the store')['merchant'] is None
+    atm = parse_sms('Rs 2000 withdrawn at ATM on 25-Sep')
+    assert (atm['merchant'], atm['method']) == (None, 'ATM')
+
+
+def test_amount_digits_are_not_read_as_the_date():
+    sms = parse_sms('Rs 25 Sep bill paid to Airtel on 03-Oct-2024')
+    assert (sms['amount'], sms['date'], sms['date_in_text']) == (25.0, '2024-10-03', True)
+    assert parse_sms('Rs 1,299 paid to Uber', date(2024, 9, 1))['date_in_text'] is False
+
+
+def test_parse_upi_sms_reads_messages_like_parse_sms():
+    text = 'HDFC Bank: INR 1,250.50 debited for Swiggy via UPI on 25/09/24'
+    tx = parse_sms(text)
+    assert parse_upi_sms(text) == {k: tx[k] for k in ('date', 'amount', 'merchant', 'raw_text')}
+    assert (tx['amount'], tx['merchant'], tx['method']) == (1250.5, 'Swiggy', 'UPI')
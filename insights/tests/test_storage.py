@@ -0,0 +1,93 @@
+import sqlite3
+import threading
+
+import pytest
+
+from utils import storage
+
+
+def test_monthly_rollup_follows_inserts_updates_and_deletes(tmp_path):
+    conn = storage.init_db(str(tmp_path / 'rollup.db'))
+    storage.insert_transactions(conn, [
+        {'date': '2024-01-05', 'amount': 100, 'category': 'Food', 'merchant': 'a', 'user_id': 'u1'},
+        {'date': '2024-01-09', 'amount': 50, 'category': 'Food', 'merchant': 'b', 'user_id': 'u1'},
+        {'date': '2024-01-12', 'amount': 30, 'category': 'Travel', 'merchant': 'c', 'user_id': 'u1'},
+        {'date': '2024-02-02', 'amount': 70, 'category': 'Food', 'merchant': 'd', 'user_id': 'u2'},
+    ])
+    with conn:
+        # empties (u1, 2024-01, Travel) and (u2, 2024-02, Food), and shrinks (u1, 2024-01, Food)
+        conn.execute("UPDATE transactions SET category = 'Bills', date = '2024-03-01' WHERE merchant = 'c'")
+        conn.execute("DELETE FROM transactions WHERE merchant IN ('b', 'd')")
+    assert conn.execute('SELECT user_id, month, category, total, count FROM monthly_rollup ORDER BY 1, 2, 3').fetchall() == [
+        ('u1', '2024-01', 'Food', 100.0, 1), ('u1', '2024-03', 'Bills', 30.0, 1)]
+    assert storage.rollup_category_totals(conn, 2024, 1, 'u1') == {'Food': 100.0}
+
+
+def test_month_queries_use_the_date_index_and_fetch_only_the_requested_columns(tmp_path):
+    conn = storage.init_db(str(tmp_path / 'indexes.db'))
+    indexes = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_transactions_date', 'idx_transactions_merchant_date', 'idx_transactions_category_date'} <= indexes
+    storage.insert_transactions(conn, [
+        {'date': '2023-12-31', 'amount': 5, 'category': 'Food', 'merchant': 'a', 'raw_text': 'x'},
+        {'date': '2024-12-01', 'amount': 7, 'category': 'Travel', 'merchant': 'b', 'raw_text': 'y'},
+        {'date': '2025-01-01', 'amount': 9, 'category': 'Food', 'merchant': 'c', 'raw_text': 'z'},
+    ])
+    assert storage.query_transactions_month(conn, 2024, 12, columns=('category', 'amount')) == [
+        {'category': 'Travel', 'amount': 7.0}]
+    assert set(storage.query_transactions_month(conn, 2024, 12)[0]) == set(storage.COLUMNS)
+    with pytest.raises(ValueError):
+        storage.query_transactions_range(conn, '2024-01-01', '2025-01-01', columns=('amount; DROP TABLE x',))
+    plan = conn.execute('EXPLAIN QUERY PLAN SELECT category, amount FROM transactions WHERE date >= ? AND date < ?',
+                        storage.month_bounds(2024, 12)).fetchall()
+    assert 'COVERING INDEX idx_transactions_date' in plan[0][-1]
+    plan = conn.execute('EXPLAIN QUERY PLAN SELECT amount FROM transactions WHERE merchant = ? AND date >= ?',
+                        ('b', '2024-01-01')).fetchall()
+    assert 'idx_transactions_merchant_date' in plan[0][-1]
+
+
+def _tx(i, **overrides):
+    return dict({'date': '2024-01-%02d' % (i % 28 + 1), 'amount': 10 + i, 'category': 'Food', 'merchant': 'm%d' % i,
+                 'user_id': 'u1'}, **overrides)
+
+
+def test_connection_pool_gives_each_thread_its_own_wal_connection(tmp_path):
+    pool = storage.ConnectionPool(str(tmp_path / 'pool.db'))
+    main = pool.connection()
+    assert pool.connection() is main
+    assert main.execute('PRAGMA journal_mode').fetchone() == ('wal',)
+    seen = []
+    worker = threading.Thread(target=lambda: seen.append(pool.connection()))
+    worker.start()
+    worker.join()
+    assert seen[0] is not main
+    assert seen[0].execute('PRAGMA synchronous').fetchone() == (1,)  # NORMAL
+    pool.close_all()
+    with pytest.raises(sqlite3.ProgrammingError):
+        main.execute('SELECT 1')
+    assert pool.connection() is not main
+
+
+def test_group_commit_writer_commits_groups_together_and_isolates_a_failing_one(tmp_path):
+    db = str(tmp_path / 'writer.db')
+    writer = storage.GroupCommitWriter(db, window=0.2)
+    good = writer.submit_many([_tx(1), _tx(2)])
+    bad = writer.submit_many([_tx(3), _tx(4, date=object())])  # unbindable, fails in the writer thread
+    assert writer.insert(_tx(5)) == 3
+    assert good.result(timeout=5) == [1, 2]
+    with pytest.raises(sqlite3.Error):
+        bad.result(timeout=5)
+    assert writer.insert_many([_tx(6), _tx(7)]) == [4, 5]
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.submit_many([_tx(8)])
+    conn = sqlite3.connect(db)
+    assert [m for m, in conn.execute('SELECT merchant FROM transactions ORDER BY id')] == ['m1', 'm2', 'm5', 'm6', 'm7']
+
+
+def test_group_commit_writer_fails_submitters_when_its_connection_cannot_open(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, 'init_db', lambda *args: sqlite3.connect(':memory:'))
+    writer = storage.GroupCommitWriter(str(tmp_path))  # a directory, so the writer thread cannot connect
+    for _ in range(2):
+        with pytest.raises(sqlite3.OperationalError):
+            writer.submit_many([_tx(1)]).result(timeout=5)
+    writer.close()
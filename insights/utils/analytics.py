@@ -19,15 +19,13 @@ def percent_change(prev, curr):
         return float('inf')  # indicate infinite increase; we'll handle in presentation
     return ((curr - prev) / prev) * 100.0
 
-def summarize_monthly_comparison(conn, year, month):
-    from .storage import query_transactions_month
-    # get current month transactions
-    cur_tx = query_transactions_month(conn, year, month)
+def summarize_monthly_comparison(conn, year, month, user_id=None):
+    from .storage import rollup_category_totals
+    # per-category totals come from the monthly rollup maintained on insert
+    cur_cat = rollup_category_totals(conn, year, month, user_id)
     # previous month
     prev_dt = datetime(year, month, 1) - relativedelta(months=1)
-    prev_tx = query_transactions_month(conn, prev_dt.year, prev_dt.month)
-    cur_cat = monthly_category_summary(cur_tx)
-    prev_cat = monthly_category_summary(prev_tx)
+    prev_cat = rollup_category_totals(conn, prev_dt.year, prev_dt.month, user_id)
 
     categories = set(list(cur_cat.keys()) + list(prev_cat.keys()))
     diffs = {}
@@ -56,7 +54,7 @@ def detect_recurring_subscriptions(conn, lookback_months=3, min_occurrences=2):
     now = datetime.utcnow().date()
     start = (now - relativedelta(months=lookback_months)).isoformat()
     end = (now + relativedelta(days=1)).isoformat()
-    txs = query_transactions_range(conn, start, end)
+    txs = query_transactions_range(conn, start, end, columns=("merchant", "amount"))
     # group by merchant
     by_merchant = {}
     for t in txs:
@@ -1,4 +1,16 @@
 # insights/utils/categorizer.py
+# Imported by the tax helper and the SMS parser from outside the insights
+# app, so it depends on nothing beyond the standard library (and optionally
+# pyahocorasick); keep storage and other app modules out of it.
+import re
+import threading
+from collections import OrderedDict
+
+try:  # C Aho-Corasick automaton; optional, see KeywordCategorizer
+    import ahocorasick
+except ImportError:  # pragma: no cover - depends on the environment
+    ahocorasick = None
+
 CATEGORY_KEYWORDS = {
     "Food": ["restaurant","cafe","dominos","mcdonald","zomato","swiggy","coffee","dine"],
     "Travel": ["uber","ola","taxi","flight","airasia","indigo","train","bus","travel","ola"],
@@ -9,11 +21,163 @@ CATEGORY_KEYWORDS = {
     "Healthcare": ["clinic","hospital","pharmacy","medicare","medicines","chemist"]
 }
 
+class KeywordCategorizer:
+    """Keyword rules compiled once and matched in a single pass over the text.
+
+    `rules` maps category -> keywords, in priority order. The result is the
+    first category (in rule order) with any keyword occurring in the
+    lower-cased text, else `default`; keywords listed in `whole_words` only
+    match on word boundaries.
+
+    With pyahocorasick installed all keywords go into one automaton and the
+    text is scanned once. Without it, keywords are pre-lowered and flattened
+    into one priority-ordered list of C substring checks, which is faster
+    than a Python-level automaton or a large regex alternation for
+    keyword sets of this size.
+    """
+
+    def __init__(self, rules, default="Other", whole_words=()):
+        self.default = default
+        whole = {w.lower() for w in whole_words}
+        self._entries = []  # (keyword, rank, category, boundary regex or None), priority order
+        seen = set()
+        for rank, (category, keywords) in enumerate(rules.items()):
+            for kw in keywords:
+                kw = kw.lower()
+                if kw in seen:
+                    continue  # the earlier category already owns this keyword
+                seen.add(kw)
+                boundary = re.compile(rf"\b{re.escape(kw)}\b") if kw in whole else None
+                self._entries.append((kw, rank, category, boundary))
+        self._automaton = None
+        if ahocorasick is not None and self._entries:
+            automaton = ahocorasick.Automaton()
+            for entry in self._entries:
+                automaton.add_word(entry[0], entry)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def categorize(self, text):
+        t = (text or "").lower()
+        if self._automaton is None:
+            for kw, _, category, boundary in self._entries:
+                if (boundary.search(t) if boundary else kw in t):
+                    return category
+            return self.default
+        best = None
+        for end, (kw, rank, category, boundary) in self._automaton.iter(t):
+            if best is not None and rank >= best[0]:
+                continue
+            if boundary is not None and not _on_word_boundary(t, end - len(kw) + 1, end + 1):
+                continue
+            best = (rank, category)
+            if rank == 0:
+                break
+        return best[1] if best else self.default
+
+def _is_word_char(c):
+    # same notion of a word character as the \b regex used without the automaton
+    return c.isalnum() or c == "_"
+
+def _on_word_boundary(text, start, end):
+    return (start == 0 or not _is_word_char(text[start - 1])) and (end == len(text) or not _is_word_char(text[end]))
+
+# Placeholder merchant names that say nothing about the category; never cached
+UNINFORMATIVE_MERCHANTS = frozenset({"", "other", "unknown", "misc"})
+
+def normalize_merchant(name):
+    """Cache key for a merchant name: lower-cased with whitespace collapsed."""
+    return " ".join(str(name or "").lower().split())
+
+class MerchantCategoryCache:
+    """Bounded LRU of normalized merchant name -> category, with hit/miss counters.
+
+    Sits in front of a categorizer so repeat merchants skip the keyword scan.
+    Safe to share between request threads.
+    """
+
+    def __init__(self, maxsize=10_000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, merchant):
+        key = normalize_merchant(merchant)
+        with self._lock:
+            category = self._data.get(key)
+            if category is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return category
+
+    def put(self, merchant, category):
+        key = normalize_merchant(merchant)
+        if key in UNINFORMATIVE_MERCHANTS or not category:
+            return
+        with self._lock:
+            self._data[key] = category
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def lookup(self, merchant, compute):
+        """Cached category for `merchant`, else `compute()` stored under it."""
+        if normalize_merchant(merchant) in UNINFORMATIVE_MERCHANTS:
+            return compute()
+        category = self.get(merchant)
+        if category is None:
+            category = compute()
+            self.put(merchant, category)
+        return category
+
+    def warm(self, pairs):
+        """Load (merchant, category) pairs, oldest first; returns the entry count."""
+        for merchant, category in pairs:
+            self.put(merchant, category)
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+_CATEGORIZER = KeywordCategorizer(CATEGORY_KEYWORDS, "Other")
+
 def categorize_transaction(raw_text, merchant=None):
-    txt = (merchant or "") + " " + (raw_text or "")
-    t = txt.lower()
-    for cat, kws in CATEGORY_KEYWORDS.items():
-        for kw in kws:
-            if kw in t:
-                return cat
-    return "Other"
+    """Category of a transaction from its merchant name and raw text.
+
+    Not cached: a keyword in the text ("amazon prime") can outrank the
+    merchant's own category ("amazon"), and SMS texts are all different.
+    """
+    return _CATEGORIZER.categorize((merchant or "") + " " + (raw_text or ""))
+
+def categorize_batch(rows):
+    """[(id, merchant, raw_text, category)] -> [(new_category, id)] for rows whose category changes.
+
+    Applies the current keyword rules, so a bulk pass reflects rule changes.
+    Module-level so it can run in a process pool.
+    """
+    categorize = _CATEGORIZER.categorize
+    out = []
+    for row_id, merchant, raw_text, category in rows:
+        new = categorize((merchant or "") + " " + (raw_text or ""))
+        if new != category:
+            out.append((new, row_id))
+    return out
@@ -0,0 +1,127 @@
+# insights/utils/dates.py
+"""Fast date extraction for Indian bank SMS formats.
+
+Handles 2024-09-25, 25-Sep, 25th Sep 2024, 25/09/24, 25.09.2024,
+Sep 25, 2024 and the same forms followed by a time (25-Sep-2024 10:32) with one precompiled
+pattern and no dateutil call. Day-first is assumed for numeric dates.
+dateutil is only used when a date-like fragment is present that the fast
+pattern cannot convert; texts with no date at all return None instead of
+paying for a fuzzy parse (which also misreads amounts such as "Rs 500"
+as the year 500).
+
+DATE_PATH_HITS counts how each call was resolved: "iso", "day_month_name",
+"month_name_day", "numeric", "dateutil" or "miss".
+"""
+import re
+from collections import Counter
+from datetime import date, datetime
+
+from dateutil import parser as dtparser
+
+_MONTH = (r"(?i:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+          r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)")
+_TIME = r"(?:[ ,T]+\d{1,2}:\d{2}(?::\d{2})?(?:\s?(?i:am|pm))?)?"
+_YEAR = r"(?:[-/ ,]\s?(?P<{}>\d{{4}}|\d{{2}})(?![\d:]))?"
+
+_DATE_GROUPS = (
+    r"(?P<iso_y>\d{4})-(?P<iso_m>\d{2})-(?P<iso_d>\d{2})" + _TIME
+    + r"|(?P<d>\d{1,2})(?:[-/](?:(?P<m>\d{1,2})|(?P<mon>" + _MONTH + r"))|(?:st|nd|rd|th)?[ -]?(?P<mon2>" + _MONTH + r"))"
+    + _YEAR.format("y") + _TIME
+    + r"|(?P<d4>\d{1,2})\.(?P<m4>\d{1,2})\.(?P<y4>\d{4}|\d{2})(?![\d.])" + _TIME
+    + r"|(?P<mon3>" + _MONTH + r")[ -](?P<d3>\d{1,2})(?:st|nd|rd|th)?" + _YEAR.format("y3") + _TIME
+)
+
+# The same alternatives without capture groups, for embedding in larger patterns
+DATE_TOKEN = re.sub(r"\(\?P<\w+>", "(?:", _DATE_GROUPS)
+
+DATE_REGEX = re.compile(r"(?<![\w/-])(?:" + _DATE_GROUPS + r")(?![\w/])")
+_DATE_FULL = re.compile(r"(?:" + _DATE_GROUPS + r")")
+# Anything a date could plausibly be built from; without it dateutil is not consulted
+_DATE_HINT = re.compile(r"\d{1,2}[-/]\d{1,2}|\d{1,2}\.\d{1,2}\.\d{2}|\d\s*" + _MONTH + r"\b|\b" + _MONTH + r"\W{0,2}\d")
+
+_MONTHS = {m: i for i, m in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1)}
+
+DATE_PATH_HITS = Counter()
+
+
+def date_path_stats():
+    """Snapshot of DATE_PATH_HITS as a plain dict."""
+    return dict(DATE_PATH_HITS)
+
+
+def _year(raw, default_year):
+    if not raw:
+        return default_year
+    year = int(raw)
+    return year + 2000 if year < 100 else year
+
+
+def _from_match(m, default_year):
+    # (date, path) from a DATE_REGEX/_DATE_FULL match, or None when the fields are out of range
+    try:
+        if m.group("iso_y"):
+            return date(int(m.group("iso_y")), int(m.group("iso_m")), int(m.group("iso_d"))), "iso"
+        if m.group("d"):
+            mon = m.group("mon") or m.group("mon2")
+            if mon:
+                month, path = _MONTHS[mon[:3].lower()], "day_month_name"
+            else:
+                month, path = int(m.group("m")), "numeric"
+            return date(_year(m.group("y"), default_year), month, int(m.group("d"))), path
+        if m.group("d4"):
+            return date(_year(m.group("y4"), default_year), int(m.group("m4")), int(m.group("d4"))), "numeric"
+        return (date(_year(m.group("y3"), default_year), _MONTHS[m.group("mon3")[:3].lower()],
+                     int(m.group("d3"))), "month_name_day")
+    except ValueError:
+        return None
+
+
+def _default(default):
+    if isinstance(default, datetime):
+        return default.date()
+    return default if isinstance(default, date) else date.today()
+
+
+def _dateutil(text, default, fuzzy):
+    DATE_PATH_HITS["dateutil"] += 1
+    try:
+        base = datetime(default.year, default.month, default.day)
+        parsed = dtparser.parse(text, dayfirst=True, fuzzy=fuzzy, default=base).date()
+    except (ValueError, OverflowError):
+        return None
+    # fuzzy parsing happily turns "Rs 500" into the year 500
+    return parsed if parsed.year >= 1900 else None
+
+
+def date_from_match(m, default=None):
+    """date for a DATE_REGEX match; missing years come from `default` (today)."""
+    default = _default(default)
+    found = _from_match(m, default.year)
+    if found is None:
+        return _dateutil(m.group(0), default, fuzzy=False)
+    DATE_PATH_HITS[found[1]] += 1
+    return found[0]
+
+
+def parse_date_token(token, default=None):
+    """date for an already isolated token (see DATE_TOKEN); missing years come from `default` (today)."""
+    m = _DATE_FULL.fullmatch(token.strip())
+    if m is None:
+        return _dateutil(token, _default(default), fuzzy=False)
+    return date_from_match(m, default)
+
+
+def extract_date(text, default=None):
+    """First date in free text as a date, or None; missing years come from `default` (today)."""
+    default = _default(default)
+    text = text or ""
+    m = DATE_REGEX.search(text)
+    found = _from_match(m, default.year) if m else None
+    if found is not None:
+        DATE_PATH_HITS[found[1]] += 1
+        return found[0]
+    if _DATE_HINT.search(text):
+        return _dateutil(text, default, fuzzy=True)
+    DATE_PATH_HITS["miss"] += 1
+    return None
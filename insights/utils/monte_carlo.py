@@ -0,0 +1,32 @@
+# insights/utils/monte_carlo.py
+"""Monte Carlo SIP projections, one chunk of paths at a time.
+
+Kept apart from main_backend so a spawned worker process can import it
+without starting the backend. Each chunk is reduced to its final balances
+and per-month percentile bands before it is returned, so neither the
+worker nor the caller ever holds more than one chunk's paths x months
+matrix.
+"""
+import math
+
+import numpy as np
+
+
+def simulate_chunk(seed, paths, months, monthly, annual_rate_percent, annual_volatility_percent,
+                   percentiles=(5, 25, 50, 75, 95)):
+    """(final balances, percentile bands) for `paths` SIPs with lognormal monthly returns.
+
+    Monthly log-returns are normal with volatility sigma / sqrt(12) and a drift
+    chosen so the expected monthly growth equals the deterministic APR / 12.
+    With P_t the cumulative growth factor, the recurrence
+    B_t = B_(t-1) * G_t + c unrolls to B_t = P_t * c * sum(1 / P_u, u <= t),
+    which is two cumulative operations over the matrix. Bands have one row
+    per percentile and one column per month.
+    """
+    rng = np.random.default_rng(seed)
+    sigma = annual_volatility_percent / 100.0 / math.sqrt(12)
+    mu = math.log1p(annual_rate_percent / 100.0 / 12.0) - sigma ** 2 / 2
+    log_growth = np.cumsum(rng.normal(mu, sigma, size=(paths, months)), axis=1)
+    balances = np.exp(log_growth)
+    balances *= monthly * np.cumsum(np.exp(-log_growth), axis=1)
+    return balances[:, -1].copy(), np.percentile(balances, percentiles, axis=0)
@@ -1,44 +1,61 @@
-import re
-from dateutil import parser as dtparser
-from datetime import datetime
-import pandas as pd
+import csv
+import io
+from contextlib import contextmanager
 
-# Regex to capture amount like ₹500, Rs. 299, INR 1000 etc.
-AMOUNT_REGEX = re.compile(r"(?:₹|Rs\.?|INR)\s?(\d+(?:\.\d{1,2})?)")
+from .sms_parser import parse_sms
 
 # Example: "ICICI Bank: Rs 500 spent at Uber on 25-Sep"
 def parse_upi_sms(text: str, received_date=None):
-    # Extract amount
-    match = AMOUNT_REGEX.search(text)
-    amount = float(match.group(1)) if match else None
-
-    # Merchant heuristic: take the word after "at" if present
-    merchant = None
-    if " at " in text:
-        merchant = text.split(" at ")[-1].split(" ")[0]
-
-    # Parse date if provided or fallback to today
-    try:
-        date = dtparser.parse(text, fuzzy=True)
-    except Exception:
-        date = received_date or datetime.today()
-
+    # Same reading as every other SMS entry point; the date falls back to
+    # received_date, then today
+    tx = parse_sms(text, received_date)
     return {
-        "date": date.strftime("%Y-%m-%d"),
-        "amount": amount,
-        "merchant": merchant,
-        "raw_text": text
+        "date": tx["date"],
+        "amount": tx["amount"],
+        "merchant": tx["merchant"],
+        "raw_text": tx["raw_text"]
     }
 
+@contextmanager
+def _open_text(file_or_buffer):
+    # accept a path, a text stream or a binary stream (e.g. an uploaded file)
+    if isinstance(file_or_buffer, (str, bytes)) or hasattr(file_or_buffer, "__fspath__"):
+        with open(file_or_buffer, newline="", encoding="utf-8", errors="ignore") as f:
+            yield f
+    elif isinstance(file_or_buffer, io.TextIOBase):
+        yield file_or_buffer
+    else:
+        wrapper = io.TextIOWrapper(file_or_buffer, encoding="utf-8", errors="ignore", newline="")
+        try:
+            yield wrapper
+        finally:
+            wrapper.detach()  # leave the caller's stream open
+
+def iter_bank_csv(file_or_buffer):
+    # Streams rows one at a time with the csv module, so memory stays constant
+    # regardless of statement size. Example CSV headers: Date, Description, Amount.
+    # Rows without a numeric Amount are skipped.
+    with _open_text(file_or_buffer) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return
+        idx = {name.strip(): i for i, name in enumerate(header)}
+        date_i, desc_i, amount_i = idx.get("Date"), idx.get("Description"), idx.get("Amount")
+        if amount_i is None:
+            raise ValueError("bank CSV has no Amount column")
+        for values in reader:
+            try:
+                amount = float(values[amount_i].replace(",", ""))
+            except (IndexError, ValueError):
+                continue
+            yield {
+                "date": values[date_i] if date_i is not None and date_i < len(values) else "None",
+                "amount": amount,
+                "merchant": values[desc_i] if desc_i is not None and desc_i < len(values) else None,
+                "raw_text": ",".join(values)
+            }
+
 def parse_bank_csv(file_or_buffer):
     # Example CSV headers: Date, Description, Amount
-    df = pd.read_csv(file_or_buffer)
-    transactions = []
-    for _, row in df.iterrows():
-        transactions.append({
-            "date": str(row.get("Date")),
-            "amount": float(row.get("Amount")),
-            "merchant": row.get("Description"),
-            "raw_text": str(row.to_dict())
-        })
-    return transactions
+    return list(iter_bank_csv(file_or_buffer))
@@ -0,0 +1,75 @@
+# insights/utils/recategorize.py
+"""Bulk re-categorization of the stored transactions with the current keyword rules."""
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from . import storage
+from .categorizer import categorize_batch
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_COMMIT_EVERY = 100_000
+
+
+def recategorize_db(db_path=storage.DEFAULT_DB_PATH, batch_size=DEFAULT_BATCH_SIZE, workers=None,
+                    commit_every=DEFAULT_COMMIT_EVERY):
+    """Re-run categorization over every row of `db_path` and write back changed categories.
+
+    Rows are streamed in id-ordered batches; each batch is categorized in one
+    call, in a process pool when workers > 1 (at most 2 * workers batches in
+    flight, so memory stays bounded). Changed categories are written with
+    executemany, committing once per `commit_every` rows scanned; the
+    monthly_rollup triggers keep the rollup in step. Callers sharing the
+    database with live writers should keep `commit_every` near `batch_size`
+    so the write lock is only held for one batch. `workers` is capped at
+    the CPU count. Returns a stats dict including rows/sec.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(int(workers or cpus), cpus))
+    conn = storage.init_db(db_path)
+    stats = {"rows": 0, "updated": 0, "batches": 0, "workers": workers, "batch_size": batch_size}
+    start = time.perf_counter()
+    pending_commit = 0
+
+    def write(rows_scanned, updates):
+        nonlocal pending_commit
+        if updates:
+            storage.update_categories(conn, updates)
+        stats["rows"] += rows_scanned
+        stats["updated"] += len(updates)
+        stats["batches"] += 1
+        pending_commit += rows_scanned
+        if pending_commit >= commit_every:
+            conn.commit()
+            pending_commit = 0
+
+    try:
+        batches = storage.iter_transaction_batches(conn, batch_size)
+        if workers == 1:
+            for rows in batches:
+                write(len(rows), categorize_batch(rows))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                in_flight = deque()
+                for rows in batches:
+                    in_flight.append((len(rows), pool.submit(categorize_batch, rows)))
+                    if len(in_flight) >= 2 * workers:
+                        n, fut = in_flight.popleft()
+                        write(n, fut.result())
+                while in_flight:
+                    n, fut = in_flight.popleft()
+                    write(n, fut.result())
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = round(elapsed, 3)
+    stats["rows_per_sec"] = round(stats["rows"] / elapsed, 1) if elapsed > 0 else 0.0
+    return stats
@@ -0,0 +1,79 @@
+# insights/utils/sms_parser.py
+"""Unified bank/UPI SMS parser shared by the services.
+
+Every SMS entry point (the insights and main_backend ingest views,
+parsers.parse_upi_sms, the tax helper and the zero-click parser worker)
+reads messages through parse_sms. Each field has its own precompiled
+pattern: one alternation over all four fields defeats the regex engine's
+literal-prefix search and is tried at every position, which profiled at
+about twice the cost of four targeted searches. Payment methods are matched
+on the lowercased text so that pattern needs no case-insensitive groups.
+Date matches are converted by utils.dates. Merchants without an
+"at"/"paid to" phrase fall back to the known-merchant keyword automaton.
+
+    parse_sms("ICICI Bank: Rs 500 spent at Uber on 25-Sep via UPI")
+    -> {"amount": 500.0, "merchant": "Uber", "date": "2024-09-25", "method": "UPI", "raw_text": ...}
+"""
+import re
+from datetime import date, datetime
+
+from .categorizer import KeywordCategorizer
+from .dates import DATE_REGEX, date_from_match
+
+METHODS = {"debit card": "Debit Card", "credit card": "Credit Card", "card": "Card"}
+_METHOD_WORDS = ("upi", "imps", "neft", "rtgs", "atm", "pos", "debit", "credit", "card")
+# words after "at"/"paid to" that are not a merchant ("at the store", "withdrawn at ATM")
+_NOT_MERCHANTS = _METHOD_WORDS + ("the", "a", "an", "my", "your", "our", "this", "that", "rs", "inr")
+
+# ₹500, Rs. 1,299.50, INR 1000 (not the "rs" ending "hours")
+AMOUNT_REGEX = re.compile(r"(?:₹|\b(?i:rs)\.?|\b(?i:inr))\s?(\d[\d,]*(?:\.\d+)?)")
+# searched in the lowercased text
+METHOD_REGEX = re.compile(r"\b(upi|imps|neft|rtgs|atm|pos|debit card|credit card|card)\b")
+MERCHANT_REGEX = re.compile(
+    r"\b(?i:at|paid to|sent to)\s+((?!(?i:" + "|".join(_NOT_MERCHANTS) + r")\b)[A-Za-z][\w&'-]*)")
+
+KNOWN_MERCHANTS = ["Amazon", "Zomato", "Uber", "Ola", "Swiggy", "Myntra", "Flipkart"]
+_KNOWN_MERCHANT_MATCHER = KeywordCategorizer({m: [m] for m in KNOWN_MERCHANTS}, None,
+                                             whole_words=KNOWN_MERCHANTS)
+
+
+def _default_date(received_date):
+    if isinstance(received_date, datetime):
+        return received_date.date()
+    return received_date if isinstance(received_date, date) else date.today()
+
+
+def _parse(text, default):
+    text = text or ""
+    amount = AMOUNT_REGEX.search(text)
+    found = DATE_REGEX.search(text)
+    if found and amount and found.start() < amount.end() and amount.start() < found.end():
+        # "Rs 25 Sep...": the digits are the amount, look for a date after them
+        found = DATE_REGEX.search(text, amount.end())
+    parsed = date_from_match(found, default) if found else None
+    method = METHOD_REGEX.search(text.lower())
+    if method is not None:
+        method = METHODS.get(method.group(1), method.group(1).upper())
+    merchant = MERCHANT_REGEX.search(text)
+    return {
+        "amount": float(amount.group(1).replace(",", "")) if amount else None,
+        "merchant": merchant.group(1) if merchant else _KNOWN_MERCHANT_MATCHER.categorize(text),
+        "date": (parsed or default).isoformat(),
+        "date_in_text": parsed is not None,
+        "method": method,
+        "raw_text": text,
+    }
+
+
+def parse_sms(text, received_date=None):
+    """Amount, merchant, date (ISO, defaulting to received_date or today) and payment method.
+
+    date_in_text says whether the date came from the message or is the default.
+    """
+    return _parse(text, _default_date(received_date))
+
+
+def parse_many(texts, received_date=None):
+    """parse_sms over an iterable of SMS bodies, sharing one default date."""
+    default = _default_date(received_date)
+    return [_parse(t, default) for t in texts]
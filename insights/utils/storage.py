@@ -1,53 +1,313 @@
 # insights/utils/storage.py
+import os
+import queue
 import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import Future
 from datetime import datetime
-from typing import Dict, Any
-
-SCHEMA = """
-CREATE TABLE IF NOT EXISTS transactions (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    date TEXT,
-    amount REAL,
-    category TEXT,
-    merchant TEXT,
-    raw_text TEXT,
-    source TEXT
-);
-"""
-
-def init_db(db_path="insights/data/transactions.db"):
+from typing import Dict, Any, Iterable, List
+
+BUDGET_ENGINE_SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "zero-click-budgeting", "budget-engine", "src"))
+if BUDGET_ENGINE_SRC not in sys.path:
+    sys.path.insert(0, BUDGET_ENGINE_SRC)
+
+import sqlite_migrations  # type: ignore  # noqa: E402
+
+DEFAULT_DB_PATH = "insights/data/transactions.db"
+DEFAULT_USER_ID = "anonymous"
+
+# Schema changes are versioned migrations in insights/migrations, applied by the
+# runner shared with zero-click budgeting (schema_version table, online index builds)
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+COLUMNS = ("id", "date", "amount", "category", "merchant", "raw_text", "source", "user_id")
+
+INSERT_SQL = "INSERT INTO transactions (date, amount, category, merchant, raw_text, source, user_id) VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+def configure_connection(conn, synchronous="NORMAL", wal=True):
+    # WAL lets readers run while a writer commits; with synchronous=NORMAL a
+    # commit no longer waits on fsync (durability is kept up to the last checkpoint)
+    synchronous = synchronous.upper()
+    if synchronous not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f"synchronous must be one of {SYNCHRONOUS_LEVELS}, got {synchronous!r}")
+    if wal:
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+def migrate(conn, target=None, log=None):
+    # bring the database up to the newest (or `target`) migration; returns those applied
+    return sqlite_migrations.migrate(conn, MIGRATIONS_DIR, target, log)
+
+def init_db(db_path=DEFAULT_DB_PATH, synchronous="NORMAL", wal=True):
     conn = sqlite3.connect(db_path, check_same_thread=False)
-    cur = conn.cursor()
-    cur.executescript(SCHEMA)
-    conn.commit()
+    configure_connection(conn, synchronous, wal)
+    migrate(conn)
     return conn
 
-def insert_transaction(conn, tx: Dict[str, Any]):
+def rebuild_monthly_rollup(conn):
+    # recompute monthly_rollup from scratch in one transaction; returns rollup row count
+    with conn:
+        conn.execute("DELETE FROM monthly_rollup")
+        conn.execute(
+            "INSERT INTO monthly_rollup (user_id, month, category, total, count) "
+            "SELECT COALESCE(user_id, 'anonymous'), COALESCE(substr(date, 1, 7), ''), COALESCE(category, 'Uncategorized'), "
+            "SUM(COALESCE(amount, 0)), COUNT(*) FROM transactions GROUP BY 1, 2, 3"
+        )
+    return conn.execute("SELECT COUNT(*) FROM monthly_rollup").fetchone()[0]
+
+def _row(tx: Dict[str, Any]):
+    return (tx["date"], tx["amount"], tx.get("category","Uncategorized"), tx.get("merchant","Unknown"), tx.get("raw_text",""), tx.get("source","sms"), tx.get("user_id") or DEFAULT_USER_ID)
+
+def insert_transaction(conn, tx: Dict[str, Any], commit=True):
     cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO transactions (date, amount, category, merchant, raw_text, source) VALUES (?, ?, ?, ?, ?, ?)",
-        (tx["date"], tx["amount"], tx.get("category","Uncategorized"), tx.get("merchant","Unknown"), tx.get("raw_text",""), tx.get("source","sms"))
-    )
-    conn.commit()
+    cur.execute(INSERT_SQL, _row(tx))
+    if commit:
+        conn.commit()
     return cur.lastrowid
 
-def query_transactions_month(conn, year:int, month:int):
-    # returns list of dicts in that month
-    cur = conn.cursor()
+def insert_transactions(conn, txs: Iterable[Dict[str, Any]]):
+    # bulk insert inside a single transaction; returns number of rows written
+    with conn:
+        cur = conn.executemany(INSERT_SQL, (_row(tx) for tx in txs))
+    return cur.rowcount
+
+def insert_transactions_returning_ids(conn, txs: Iterable[Dict[str, Any]]) -> List[int]:
+    # like insert_transactions (one transaction, one prepared INSERT) but
+    # reports each row's id, for callers that answer per item
+    with conn:
+        cur = conn.cursor()
+        ids = []
+        for tx in txs:
+            cur.execute(INSERT_SQL, _row(tx))
+            ids.append(cur.lastrowid)
+    return ids
+
+def iter_transaction_batches(conn, batch_size=5000, columns=("merchant", "raw_text", "category")):
+    # streams [(id, *columns)] lists in id order using keyset pagination, so a
+    # full-table pass never holds more than one batch or a long-lived cursor
+    cols = ", ".join(_select_columns(columns))
+    sql = f"SELECT id, {cols} FROM transactions WHERE id > ? ORDER BY id LIMIT ?"
+    last_id = 0
+    while True:
+        rows = conn.execute(sql, (last_id, batch_size)).fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+def update_categories(conn, updates: Iterable[tuple]):
+    # [(category, id)] through one prepared UPDATE; the caller owns the transaction
+    return conn.executemany("UPDATE transactions SET category = ? WHERE id = ?", updates).rowcount
+
+class ConnectionPool:
+    """Hands each thread its own connection to one database file.
+
+    sqlite3 connections must not be shared across threads while a cursor is
+    in use, so Flask worker threads each get a lazily opened, WAL-configured
+    connection instead of contending on a single `check_same_thread=False` one.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, synchronous="NORMAL", wal=True):
+        self.db_path = db_path
+        self.synchronous = synchronous
+        self.wal = wal
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        # create the schema (and switch the file to WAL) once up front
+        self._local.conn = self._track(init_db(db_path, synchronous, wal))
+
+    def _track(self, conn):
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread=False only so close_all() can run from any thread;
+            # each connection is still used by the thread that opened it
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            configure_connection(conn, self.synchronous, self.wal)
+            self._local.conn = conn = self._track(conn)
+        return conn
+
+    def close_all(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+_STOP = object()
+
+class GroupCommitWriter:
+    """Single background writer that batches concurrent inserts into one commit.
+
+    `submit_many()` queues a group of transactions and returns a Future for
+    their row ids; a group is always written in one transaction. The writer
+    thread takes every group already queued (up to `max_batch` rows), waiting
+    up to `window` seconds after the first for stragglers, and commits them
+    together, so N concurrent producers pay for one commit instead of N. If
+    that commit fails, the groups are retried one by one so only the failing
+    group sees the error. Groups that arrive during a commit join the next batch.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, window=0.0, max_batch=500, synchronous="NORMAL"):
+        self.db_path = db_path
+        self.window = window
+        self.max_batch = max_batch
+        self.synchronous = synchronous
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        init_db(db_path, synchronous).close()
+        self._thread = threading.Thread(target=self._run, name="insights-group-commit", daemon=True)
+        self._thread.start()
+
+    def submit_many(self, txs: Iterable[Dict[str, Any]]) -> Future:
+        if self._closed:
+            raise RuntimeError("GroupCommitWriter is closed")
+        fut: Future = Future()
+        self._queue.put(([_row(tx) for tx in txs], fut))
+        return fut
+
+    def insert(self, tx: Dict[str, Any]):
+        # blocking convenience wrapper matching insert_transaction's return value
+        return self.submit_many([tx]).result()[0]
+
+    def insert_many(self, txs: Iterable[Dict[str, Any]]) -> List[int]:
+        # blocking, like insert_transactions_returning_ids
+        return self.submit_many(txs).result()
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
+            # groups that raced close() in behind the stop marker
+            while not self._queue.empty():
+                self._queue.get()[1].set_exception(RuntimeError("GroupCommitWriter is closed"))
+
+    def _run(self):
+        try:
+            conn = sqlite3.connect(self.db_path)
+            configure_connection(conn, self.synchronous)
+        except Exception as exc:
+            # fail every group instead of leaving submitters waiting on their futures
+            for item in iter(self._queue.get, _STOP):
+                item[1].set_exception(exc)
+            return
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            rows = len(item[0])
+            deadline = time.monotonic() + self.window
+            while rows < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                rows += len(item[0])
+            if not self._write(conn, batch, fail=len(batch) == 1):
+                for group in batch:
+                    self._write(conn, [group], fail=True)
+        conn.close()
+
+    def _write(self, conn, batch, fail):
+        # False if the batch failed and its futures are left for a retry; with
+        # `fail` set a failure is passed to the futures instead
+        try:
+            with conn:
+                cur = conn.cursor()
+                ids = []
+                for rows, _ in batch:
+                    group_ids = []
+                    for row in rows:
+                        cur.execute(INSERT_SQL, row)
+                        group_ids.append(cur.lastrowid)
+                    ids.append(group_ids)
+        except Exception as exc:
+            if fail:
+                for _, fut in batch:
+                    fut.set_exception(exc)
+            return fail
+        for (_, fut), group_ids in zip(batch, ids):
+            fut.set_result(group_ids)
+        return True
+
+def _select_columns(columns):
+    cols = list(columns) if columns else list(COLUMNS)
+    unknown = [c for c in cols if c not in COLUMNS]
+    if unknown:
+        raise ValueError(f"unknown transaction columns: {unknown}")
+    return cols
+
+def month_bounds(year:int, month:int):
+    # [start, end) ISO date strings for a calendar month
     start = f"{year:04d}-{month:02d}-01"
-    # compute next month for exclusive end
     if month == 12:
         end = f"{year+1:04d}-01-01"
     else:
         end = f"{year:04d}-{month+1:02d}-01"
-    cur.execute("SELECT id, date, amount, category, merchant, raw_text, source FROM transactions WHERE date >= ? AND date < ?", (start, end))
-    rows = cur.fetchall()
-    cols = ["id","date","amount","category","merchant","raw_text","source"]
-    return [dict(zip(cols, r)) for r in rows]
+    return start, end
+
+def query_transactions_month(conn, year:int, month:int, columns=None):
+    # returns list of dicts in that month; pass columns to fetch only what the caller needs
+    start, end = month_bounds(year, month)
+    return query_transactions_range(conn, start, end, columns)
 
-def query_transactions_range(conn, start_date, end_date):
+def query_transactions_range(conn, start_date, end_date, columns=None):
+    cols = _select_columns(columns)
     cur = conn.cursor()
-    cur.execute("SELECT id, date, amount, category, merchant, raw_text, source FROM transactions WHERE date >= ? AND date < ?", (start_date, end_date))
+    cur.execute(f"SELECT {', '.join(cols)} FROM transactions WHERE date >= ? AND date < ?", (start_date, end_date))
     rows = cur.fetchall()
-    cols = ["id","date","amount","category","merchant","raw_text","source"]
     return [dict(zip(cols, r)) for r in rows]
+
+def rollup_category_totals(conn, year:int, month:int, user_id=None):
+    # {category: total} for a month from monthly_rollup; all users when user_id is None
+    sql = "SELECT category, SUM(total) FROM monthly_rollup WHERE month = ?"
+    params = [f"{year:04d}-{month:02d}"]
+    if user_id is not None:
+        sql += " AND user_id = ?"
+        params.append(user_id)
+    cur = conn.execute(sql + " GROUP BY category", params)
+    return {category: float(total or 0.0) for category, total in cur.fetchall()}
+
+def rollup_monthly_totals(conn, user_id=None, limit=6):
+    # most recent `limit` months as [{"month", "total", "count"}], oldest first
+    sql = "SELECT month, SUM(total), SUM(count) FROM monthly_rollup WHERE month != ''"
+    params = []
+    if user_id is not None:
+        sql += " AND user_id = ?"
+        params.append(user_id)
+    sql += " GROUP BY month ORDER BY month DESC LIMIT ?"
+    params.append(limit)
+    rows = conn.execute(sql, params).fetchall()
+    return [{"month": m, "total": float(t or 0.0), "count": int(c or 0)} for m, t, c in reversed(rows)]
+
+def recent_merchant_categories(conn, limit=10_000):
+    # (merchant, category) for the `limit` most recently stored merchants, oldest first;
+    # the bare category column comes from the MAX(rowid) row, i.e. the latest one
+    rows = conn.execute(
+        "SELECT merchant, category, MAX(rowid) AS last FROM transactions "
+        "WHERE merchant IS NOT NULL AND category IS NOT NULL "
+        "GROUP BY merchant ORDER BY last DESC LIMIT ?", (limit,)
+    ).fetchall()
+    return [(merchant, category) for merchant, category, _ in reversed(rows)]
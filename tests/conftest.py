@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# main_backend.py lives at the repo root and imports insights.utils as a package from there
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+@pytest.fixture(scope='session')
+def backend(tmp_path_factory):
+    # read at import time, so set before the first import and never touch insights/data
+    os.environ['INSIGHTS_DB_PATH'] = str(tmp_path_factory.mktemp('insights') / 'transactions.db')
+    import main_backend
+    return main_backend
+
+
+@pytest.fixture
+def client(backend):
+    return backend.app.test_client()
@@ -0,0 +1,286 @@
+"""Flask test-client checks of the unified backend (main_backend.py)."""
+import io
+import os
+import time
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out waiting for the background thread'
+        time.sleep(0.02)
+
+
+def test_webhook_rejects_malformed_fields(client):
+    for payload in ({'amount': 10, 'merchant': 123}, {'amount': 'ten', 'merchant': 'x'},
+                    {'amount': [1], 'merchant': 'x'}, {'amount': 'nan', 'merchant': 'x'},
+                    {'amount': 5, 'merchant': 'x', 'user_id': ['u']}, {'amount': -5, 'merchant': 'x'}):
+        assert client.post('/webhook/upi', json=payload).status_code == 400, payload
+
+
+def test_webhook_events_reach_the_gauge_once(backend, client):
+    user = 'webhook-user'
+    for amount, merchant in ((50, 'Swiggy'), (70, 'Uber')):
+        r = client.post('/webhook/upi', json={'amount': amount, 'merchant': merchant, 'user_id': user})
+        assert r.status_code == 202
+    _wait_for(lambda: backend._budget_spent(user)[1] == 2)
+    assert backend._budget_spent(user) == (120, 2)
+    # the same transaction re-sent within the window is dropped at the webhook
+    r = client.post('/webhook/upi', json={'amount': 50, 'merchant': 'Swiggy', 'user_id': user})
+    assert r.get_json() == {'queued': False, 'duplicate': True}
+
+
+def test_failing_event_is_dead_lettered_without_double_counting(backend, client, monkeypatch):
+    user = 'poison-user'
+    real = backend.categorize_merchant
+
+    def categorize(merchant):
+        if merchant == 'Explodes':
+            raise RuntimeError('categorizer failure')
+        return real(merchant)
+
+    monkeypatch.setattr(backend, 'categorize_merchant', categorize)
+    dead_before = len(backend.BUDGET_EVENT_APPLIER.dead_letters)
+    for amount, merchant in ((50, 'Swiggy'), (60, 'Explodes'), (70, 'Zomato')):
+        client.post('/webhook/sms', json={'amount': amount, 'merchant': merchant, 'user_id': user})
+    _wait_for(lambda: len(backend.BUDGET_EVENT_APPLIER.dead_letters) > dead_before
+              and backend._budget_spent(user)[1] == 2)
+    assert backend._budget_spent(user) == (120, 2)
+
+
+def test_queue_full_does_not_mark_the_retry_as_duplicate(backend, client, monkeypatch):
+    def full_put(event):
+        raise backend.QueueFull('ingest queue is full')
+
+    payload = {'amount': 99, 'merchant': 'Croma', 'user_id': 'retry-user'}
+    monkeypatch.setattr(backend.BUDGET_INGEST_QUEUE, 'put', full_put)
+    assert client.post('/webhook/upi', json=payload).status_code == 503
+    monkeypatch.undo()
+    assert client.post('/webhook/upi', json=payload).status_code == 202
+
+
+def test_sms_dedup_keys_on_the_merchant_named_in_the_text(client):
+    user = 'sms-dedup-user'
+    first = client.post('/api/insights/ingest/sms', json={'text': 'Rs 250 spent at Starbucks', 'user_id': user})
+    assert 'duplicate' not in first.get_json()
+    # both merchants are unknown to the keyword matcher, but they are different purchases
+    other = client.post('/api/insights/ingest/sms', json={'text': 'Rs 250 spent at Croma', 'user_id': user})
+    assert 'duplicate' not in other.get_json()
+    # the bank SMS names the card, the app notification does not: still the same purchase
+    client.post('/api/insights/ingest/sms', json={'text': 'Rs 99 spent at Dominos card ending 4321', 'user_id': user})
+    copy = client.post('/api/insights/ingest/sms', json={'text': 'You paid Rs 99 at Dominos', 'user_id': user})
+    assert copy.get_json()['duplicate'] is True
+
+
+def test_single_and_batch_sms_ingest_parse_alike(client):
+    text = 'Rs 1,299 paid to Uber on 05-Sep-2024 via UPI'
+    single = client.post('/api/insights/ingest/sms', json={'text': text, 'user_id': 'parse-alike-a'}).get_json()
+    batch = client.post('/api/insights/ingest/sms/batch',
+                        json={'user_id': 'parse-alike-b', 'messages': [text]}).get_json()['results'][0]
+    fields = ('amount', 'merchant', 'category', 'date', 'method')
+    assert [single[f] for f in fields] == [batch[f] for f in fields]
+    assert single['amount'] == 1299.0 and single['date'] == '2024-09-05'
+
+
+def test_recurring_sms_on_different_days_are_not_duplicates(client):
+    messages = [f'Rs 649 paid to Netflix on {d}' for d in ('01-Aug-2024', '01-Sep-2024', '01-Oct-2024')]
+    messages += ['Rs 120 paid to Uber on 02-Sep-2024', 'Rs 120 paid to Uber on 03-Sep-2024']
+    r = client.post('/api/insights/ingest/sms/batch', json={'user_id': 'recurring-user', 'messages': messages}).get_json()
+    assert (r['inserted'], r['duplicates']) == (5, 0)
+    resent = client.post('/api/insights/ingest/sms', json={'text': messages[1], 'user_id': 'recurring-user'})
+    assert resent.get_json()['duplicate'] is True
+
+
+def test_failed_batch_insert_does_not_mark_its_messages_as_seen(backend, client, monkeypatch):
+    body = {'user_id': 'batch-retry-user', 'messages': ['Rs 310 spent at Decathlon via UPI']}
+
+    def fail(txs):
+        raise RuntimeError('disk full')
+
+    monkeypatch.setattr(backend._insights_writer(), 'insert_many', fail)
+    assert client.post('/api/insights/ingest/sms/batch', json=body).status_code == 500
+    monkeypatch.undo()
+    r = client.post('/api/insights/ingest/sms/batch', json=body).get_json()
+    assert r['inserted'] == 1 and r['results'][0]['status'] == 'inserted'
+
+
+def test_sweep_rejects_bad_scenarios_with_400(client):
+    for payload in ({'scenarios': [1]}, {'scenarios': [{'months': 'x'}]}, {'scenarios': [{'months': 10 ** 6}]},
+                    {'scenarios': [{'loan_apr': 'nan'}]}, {'grid': [12, 24]}, {'grid': {'months': 12}},
+                    {'scenarios': [{'loan_apr': 1e6, 'months': 1200}]}):
+        r = client.post('/api/digital-twin/sweep', json=payload)
+        assert r.status_code == 400, (payload, r.get_data(as_text=True))
+    ok = client.post('/api/digital-twin/sweep', json={'grid': {'months': [12, 24], 'loan_apr': [0, 16]}})
+    assert ok.status_code == 200 and ok.get_json()['count'] == 4
+
+
+def test_sweep_keeps_top_level_zeros_instead_of_the_defaults(backend):
+    cols = backend._sweep_scenarios({'loan_apr': 0, 'down_payment': 0, 'scenarios': [{'months': 24}, {'loan_apr': 9}]})
+    assert cols['loan_apr'].tolist() == [0.0, 9.0] and cols['down_payment'].tolist() == [0.0, 0.0]
+    assert cols['investment_monthly'].tolist() == [backend.SWEEP_DEFAULTS['investment_monthly']] * 2
+    assert backend._sweep_scenarios({'months': 0})['months'].tolist() == [0.0]
+
+
+def test_simulate_caps_months_and_returns_rle_as_one_run(client):
+    for months in (10 ** 7, -1, 'soon'):
+        r = client.post('/api/digital-twin/simulate', json={'months': months})
+        assert r.status_code == 400, months
+    emi = client.post('/api/digital-twin/simulate', json={'months': 24, 'schedule_format': 'rle'}).get_json()['emi']
+    assert emi['schedule'] == [[emi['emi'], 24]] and emi['schedule_format'] == 'rle'
+
+
+def test_state_snapshot_round_trip_skips_unchanged_saves(backend, tmp_path):
+    path = str(tmp_path / 'state.pickle')
+    backend._record_budget_transaction('snapshot-user', {'amount': 42, 'merchant': 'Uber', 'method': 'UPI',
+                                                         'timestamp': '2024-03-05T10:00:00'})
+    assert backend.save_state_snapshot(path) == path
+    assert backend.save_state_snapshot(path) is None
+    assert backend.SNAPSHOT_STATS['skipped_unchanged'] >= 1 and not os.path.exists(path + '.tmp')
+    backend._record_budget_transaction('snapshot-user', {'amount': 8, 'merchant': 'Ola', 'method': 'UPI',
+                                                         'timestamp': '2024-03-06T10:00:00'})
+    assert backend._budget_spent('snapshot-user') == (50, 2)
+    assert backend.load_state_snapshot(path)
+    assert backend._budget_spent('snapshot-user') == (42, 1)
+    assert backend.BUDGET_TRANSACTIONS.count('snapshot-user') == 1
+
+
+def test_snapshot_packs_partitions_by_column_and_unpacks_them_on_first_use(backend, tmp_path):
+    rows = [{'amount': float(i), 'count': i, 'merchant': 'Uber' if i % 2 else 'Ola', 'timestamp': f'2024-07-{i + 1:02d}',
+             'note': None} for i in range(12)]
+    odd = [{'amount': 1.0, 'timestamp': '2024-08-01'}, {'amount': 2, 'timestamp': '2024-08-02', 'tag': 'x'}]
+    store = backend.TransactionStore('timestamp')
+    for row in rows + odd:
+        store.append('packed-user', row)
+    packed = backend.TransactionStore.pack_partitions(store.to_dict()['partitions'])['packed-user']
+    assert isinstance(packed['2024-07'], backend.PackedRows) and packed['2024-08'] == odd
+    assert packed['2024-07'].unpack() == rows
+
+    path = str(tmp_path / 'packed.pickle')
+    backend.BUDGET_TRANSACTIONS.replace_user('packed-user', rows + odd)
+    assert backend.save_state_snapshot(path) == path
+    assert backend.load_state_snapshot(path)
+    assert isinstance(backend.BUDGET_TRANSACTIONS._partitions['packed-user']['2024-07'], backend.PackedRows)
+    assert backend.BUDGET_TRANSACTIONS.for_user('packed-user') == rows + odd
+    assert backend.save_state_snapshot(path) is None  # unchanged since the load
+    backend.BUDGET_TRANSACTIONS.append('packed-user', {'amount': 5.0, 'count': 0, 'merchant': 'Ola',
+                                                       'timestamp': '2024-07-30', 'note': None})
+    assert len(backend.BUDGET_TRANSACTIONS.month('packed-user', '2024-07')) == 13
+
+
+def test_single_and_batch_sms_ingest_share_persistence_and_ids(backend, client):
+    user = 'ingest-parity-user'
+    single = client.post('/api/insights/ingest/sms', json={'text': 'Rs 120 spent at Chaayos', 'user_id': user})
+    batch = client.post('/api/insights/ingest/sms/batch', json={'user_id': user, 'messages': ['Rs 640 spent at Nykaa']})
+    ids = [single.get_json()['id'], batch.get_json()['results'][0]['id']]
+    stored = backend._insights_db().execute(
+        'SELECT id, amount FROM transactions WHERE user_id = ? ORDER BY id', (user,)).fetchall()
+    assert stored == [(ids[0], 120.0), (ids[1], 640.0)]
+    assert [t['id'] for t in backend.TRANSACTIONS.for_user(user)] == ids
+    assert client.post('/api/insights/ingest/sms', json={'text': 'no amount here', 'user_id': user}).status_code == 400
+
+
+def test_transaction_store_partitions_by_user_and_month(backend):
+    store = backend.TransactionStore('date')
+    assert store.append('u1', {'date': '2024-03-31', 'amount': 1}) == '2024-03'
+    assert store.append('u1', {'date': '2024-01-05T09:00:00', 'amount': 2}) == '2024-01'
+    assert store.append('u2', {'date': 'March 3, 2024', 'amount': 3}) == '2024-03'
+    assert store.append('u1', {'date': 'not a date', 'amount': 4}) is None
+    assert (len(store), store.count('u1'), store.months('u1')) == (3, 2, ['2024-01', '2024-03'])
+    assert [t['amount'] for t in store.month('u1', '2024-03')] == [1]
+    assert [t['amount'] for t in store.for_user('u1')] == [2, 1]
+    store.replace_user('u1', [{'date': '2024-02-01', 'amount': 5}])
+    assert (len(store), store.months('u1'), store.month('u2', '2024-03')[0]['amount']) == (2, ['2024-02'], 3)
+
+
+def test_budget_transactions_endpoint_reads_one_users_month(backend, client):
+    for user, ts in (('partition-a', '2024-05-02T10:00:00'), ('partition-a', '2024-06-02T10:00:00'),
+                     ('partition-b', '2024-05-03T10:00:00')):
+        backend._record_budget_transaction(user, {'amount': 10, 'merchant': 'Ola', 'method': 'UPI', 'timestamp': ts})
+    rows = client.get('/budget/transactions?user_id=partition-a&month=2024-05').get_json()
+    assert [r['timestamp'] for r in rows] == ['2024-05-02T10:00:00']
+    assert client.get('/budget/gauge?user_id=partition-a&month=2024-06').get_json()['spent'] == 10
+
+
+def test_monte_carlo_is_seeded_per_chunk_and_matches_the_fixed_rate_without_volatility(backend, client):
+    finals, bands = backend._monte_carlo_paths(3000, 12, 18, 24, backend.MONTE_CARLO_CHUNK * 2, seed=7, workers=1)
+    first_chunk, _ = backend._monte_carlo_paths(3000, 12, 18, 24, backend.MONTE_CARLO_CHUNK, seed=7, workers=1)
+    assert finals.shape == (backend.MONTE_CARLO_CHUNK * 2,) and bands.shape == (5, 24)
+    assert (finals[:backend.MONTE_CARLO_CHUNK] == first_chunk).all()
+    flat, flat_bands = backend._monte_carlo_paths(3000, 12, 0, 24, 10, seed=1, workers=1)
+    assert abs(flat[0] - backend._project_balance(0, 3000, 0.01, 24)) < 1e-6
+    assert abs(flat_bands[2, -1] - flat[0]) < 1e-6
+
+    body = {'months': 24, 'monte_carlo': True, 'paths': 500, 'seed': 42}
+    runs = [client.post('/api/digital-twin/simulate', json=body).get_json()['monte_carlo'] for _ in range(2)]
+    assert runs[0] == runs[1] and 0 <= runs[0]['prob_equity_beats_gold'] <= 1
+    bands = runs[0]['equity']['final_percentiles']
+    assert bands['p5'] <= bands['p50'] <= bands['p95']
+    for bad in ({'paths': 10 ** 6}, {'paths': 5000, 'months': 1200}, {'equity_volatility': -1}, {'seed': 'lucky'}):
+        assert client.post('/api/digital-twin/simulate', json={**body, **bad}).status_code == 400, bad
+
+
+def test_closed_form_projection_matches_the_monthly_recurrence(backend):
+    for principal, contribution, rate in ((50000, 2500, 0.004), (80000, -3000, 0.005), (1000, 100, 0.0)):
+        balance, path = principal, []
+        for _ in range(120):
+            balance = balance * (1 + rate) + contribution
+            path.append(balance)
+        assert max(abs(a - b) for a, b in zip(backend._project_path(principal, contribution, rate, 120), path)) < 1e-6
+        assert abs(backend._project_balance(principal, contribution, rate, 120) - path[-1]) < 1e-6
+        for target in (0.0, 60000.0, 200000.0):
+            above = next((m for m, b in enumerate(path, 1) if b >= target), None)
+            below = next((m for m, b in enumerate(path, 1) if b <= target), None)
+            assert backend._first_month_at_or_above(principal, contribution, rate, target, 120) == above
+            assert backend._first_month_at_or_below(principal, contribution, rate, target, 120) == below
+
+
+def test_time_machine_upload_keeps_only_monthly_net_and_feeds_the_forecast(backend, client):
+    csv_text = ('date,amount,description\n2024-01-03,50000,salary\n2024-01-20,-30000,rent\n'
+                '2024-02-03,50000,salary\n2024-02-11,-40000,trip\nbad-date,-5,skip\n2024-03-01,oops,skip\n')
+    r = client.post('/api/time-machine/upload?user_id=tm-raw', data=csv_text, content_type='text/csv')
+    assert r.get_json() == {'ok': True, 'count': 4, 'months': 2}
+    assert backend.TIME_MACHINE_HISTORY['tm-raw'] == {'monthly_net': {'2024-01': 20000.0, '2024-02': 10000.0},
+                                                      'avg_monthly_net': 15000.0}
+    r = client.post('/api/time-machine/upload', data={'user_id': 'tm-file', 'file': (io.BytesIO(csv_text.encode()), 'h.csv')},
+                    content_type='multipart/form-data')
+    assert r.get_json()['count'] == 4
+    forecast = client.post('/api/time-machine/forecast', json={'user_id': 'tm-file', 'expected_return_annual': 0.0001,
+                                                              'big_purchase': 45000, 'current_balance': 1}).get_json()
+    assert forecast['avg_monthly_net'] == 15000.0 and forecast['can_afford_in'] == {'years': 0, 'months': 3}
+    assert client.post('/api/time-machine/upload?user_id=tm-raw', data='', content_type='text/csv').status_code == 400
+
+
+def test_time_machine_chat_reuses_the_memoized_projection_until_a_new_upload(backend, client):
+    def upload(net):
+        client.post('/api/time-machine/upload?user_id=tm-chat', content_type='text/csv',
+                    data=f'date,amount,description\n2024-05-01,{net},net\n')
+
+    ask = {'user_id': 'tm-chat', 'question': 'What is my average monthly net?', 'current_balance': 1234}
+    upload(8000)
+    backend._time_machine_projection.cache_clear()
+    assert client.post('/api/time-machine/chat', json=ask).get_json()['answer'].endswith('₹8,000.')
+    client.post('/api/time-machine/chat', json=dict(ask, question='When will I run out of money?'))
+    forecast = client.post('/api/time-machine/forecast', json=ask).get_json()
+    assert forecast['avg_monthly_net'] == 8000.0
+    info = backend._time_machine_projection.cache_info()
+    assert (info.misses, info.hits) == (1, 2)
+    upload(-500)
+    assert client.post('/api/time-machine/chat', json=ask).get_json()['answer'].endswith('₹-500.')
+    assert backend._time_machine_projection.cache_info().misses == 2
+
+
+def test_recategorize_runs_in_the_background_and_reports_its_result(backend, client):
+    assert client.post('/api/insights/recategorize', json={'workers': 'many'}).status_code == 400
+    started = client.post('/api/insights/recategorize', json={'workers': 10 ** 6, 'batch_size': 100})
+    assert started.status_code == 202 and started.get_json()['workers'] == (os.cpu_count() or 1)
+    _wait_for(lambda: client.get('/api/insights/recategorize').get_json()['status'] != 'running')
+    job = client.get('/api/insights/recategorize').get_json()
+    assert job['status'] == 'done' and job['stats']['batch_size'] == 100
+
+
+def test_budget_merchant_cache_is_warmed_from_stored_merchants(backend, client):
+    client.post('/api/insights/ingest/sms', json={'text': 'Rs 75 paid to Rapido via UPI', 'user_id': 'warm-user'})
+    backend.MERCHANT_CATEGORY_CACHE.clear()
+    assert backend.warm_merchant_cache()['size'] >= 1
+    assert backend.MERCHANT_CATEGORY_CACHE.get('rapido') == backend.MERCHANT_CATEGORIZER.categorize('Rapido')
+    assert client.get('/health').get_json()['merchant_cache']['hits'] == 1
@@ -1,5 +1,8 @@
+import math
 import os
 import sys
+import threading
+from datetime import datetime
 from typing import List, Dict, Any
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
@@ -14,58 +17,246 @@ if ENGINE_SRC not in sys.path:
 
 load_dotenv(os.path.join(PROJECT_ROOT, ".env"))
 
-from budget_engine import compute_gauge  # type: ignore
+from budget_engine import GaugeAggregate  # type: ignore
+from dedup_index import DuplicateIndex, account_tail, transaction_keys  # type: ignore
+from event_log import EventLog, load_snapshot, write_snapshot  # type: ignore
+from ingest_queue import QueueFull, open_queue, start_drainer  # type: ignore
+from repository import TS_MAX, BudgetRepository, sqlite_path  # type: ignore
 
 app = Flask(__name__, static_folder=os.path.join(CUR_DIR, "static"))
 CORS(app)  # Enable CORS for all routes
 
-# In-memory store to keep demo simple
-TRANSACTIONS: List[Dict[str, Any]] = []
+# Webhooks that don't name a user are booked to the seeded demo user
+DEFAULT_USER_ID = os.getenv("DEFAULT_USER_ID", "demo")
+
+# Transactions and per-user budgets persisted in SQLite (schema from db/migrations);
+# MONTHLY_LIMIT only sets the limit of users without a budget row
+REPOSITORY = BudgetRepository(
+    sqlite_path(os.getenv("DB_URL", "sqlite:///data/zero_click.db"), PROJECT_ROOT),
+    default_limit=float(os.getenv("MONTHLY_LIMIT", "50000")),
+)
+
+# Every accepted webhook is first appended to the write-ahead event log (synced
+# before it is queued, by default); the gauge is rebuilt on start from the
+# newest snapshot plus the log after it.
+EVENT_LOG_DIR = os.getenv("EVENT_LOG_DIR", os.path.join(PROJECT_ROOT, "data", "event-log"))
+EVENT_LOG = EventLog(
+    EVENT_LOG_DIR,
+    segment_bytes=int(os.getenv("EVENT_LOG_SEGMENT_BYTES", str(16 * 1024 * 1024))),
+    fsync=os.getenv("EVENT_LOG_FSYNC", "always"),
+)
+SNAPSHOT_EVERY = int(os.getenv("SNAPSHOT_EVERY", "10000"))
+
+
+# "external": workers/ingestion_worker/worker.py drains the queue and stores the
+# transactions; this process only enqueues and follows the database for gauges
+INGEST_WORKER = os.getenv("INGEST_WORKER", "inline")
+
+
+def _restore():
+    """Per-user gauges from the newest snapshot plus the log after it.
+
+    Logged events the database has not stored yet (e.g. still queued in
+    memory when the process stopped) are inserted on the way.
+    """
+    seq, state = load_snapshot(EVENT_LOG_DIR)
+    if state and "total" in state:
+        state = {DEFAULT_USER_ID: state}  # snapshot from before gauges were per user
+    gauges = {user_id: GaugeAggregate.from_dict(s) for user_id, s in (state or {}).items()}
+    db_seq = REPOSITORY.next_event_seq()
+    # with a relaxed EVENT_LOG_FSYNC the log can lose a tail the snapshot or
+    # database already holds; never hand those sequence numbers out again
+    EVENT_LOG.advance_to(max(seq, db_seq))
+    missing = []
+    for event_seq, tx in EVENT_LOG.events(min(seq, db_seq)):
+        if event_seq >= seq:
+            gauges.setdefault(tx.get("user_id", DEFAULT_USER_ID), GaugeAggregate()).add(tx)
+        if event_seq >= db_seq:
+            missing.append({**tx, "seq": event_seq})
+            if len(missing) >= 5000:
+                REPOSITORY.add_transactions(missing, DEFAULT_USER_ID)
+                missing = []
+    REPOSITORY.add_transactions(missing, DEFAULT_USER_ID)
+    if INGEST_WORKER == "external":
+        return {}, seq  # rebuilt from the database by _follow_repository
+    return gauges, seq
+
+
+# Per-user running totals kept in step with the event log so gauge reads are O(1)
+GAUGES, SNAPSHOT_SEQ = _restore()
+# Sequence number of the next log event the gauge has not seen
+APPLIED_SEQ = EVENT_LOG.next_seq
+# Recently seen (amount, merchant, account) fingerprints; redelivered webhooks are dropped
+DEDUP = DuplicateIndex(window_seconds=float(os.getenv("DEDUP_WINDOW_SECONDS", "300")))
+# Keeps log order and queue order the same, so APPLIED_SEQ only moves forward;
+# the 202 is only sent once the event is in the log and the queue
+_INGEST_LOCK = threading.Lock()
+
+
+def _record(tx: Dict[str, Any]) -> None:
+    tx.setdefault("ts", datetime.now().isoformat())
+    GAUGES.setdefault(tx.get("user_id", DEFAULT_USER_ID), GaugeAggregate()).add(tx)
+
+
+def _apply_batch(events: List[Dict[str, Any]]) -> None:
+    global APPLIED_SEQ, SNAPSHOT_SEQ
+    applied, fresh = APPLIED_SEQ, []
+    for tx in events:
+        seq = tx.get("seq")
+        if seq is not None:
+            if seq < applied:
+                continue  # already applied via log replay (e.g. redelivered from a SQLite queue)
+            applied = seq + 1
+        fresh.append(tx)
+    # one bulk insert per batch; if it fails, drain() retries the batch before any gauge changed
+    REPOSITORY.add_transactions(fresh, DEFAULT_USER_ID)
+    for tx in fresh:
+        tx.pop("seq", None)
+        _record(tx)
+    APPLIED_SEQ = applied
+    if APPLIED_SEQ - SNAPSHOT_SEQ >= SNAPSHOT_EVERY:
+        # runs on the drainer thread, off the request path
+        write_snapshot(EVENT_LOG_DIR, APPLIED_SEQ, {u: g.to_dict() for u, g in GAUGES.items()})
+        SNAPSHOT_SEQ = APPLIED_SEQ
+        # the database holds every event before APPLIED_SEQ too, so the log no longer needs them
+        EVENT_LOG.drop_segments_before(SNAPSHOT_SEQ)
+
+
+def _follow_repository(stop: threading.Event, poll_interval: float = 0.5) -> None:
+    """External-worker mode: fold the rows the worker commits into GAUGES, oldest first."""
+    last_id = 0
+    while not stop.is_set():
+        rows = REPOSITORY.transactions_after(last_id)
+        for row in rows:
+            _record({**row, "method": row["source"]})
+        if rows:
+            last_id = rows[-1]["id"]
+            continue
+        # caught up: the worker has stored every logged event before this point
+        EVENT_LOG.drop_segments_before(REPOSITORY.next_event_seq())
+        if stop.wait(poll_interval):
+            return
+
+
+# Webhooks only validate, log and enqueue; a drainer applies events in batches.
+# INGEST_QUEUE=sqlite:<path> keeps queued events across restarts, and
+# INGEST_WORKER=external leaves draining to workers/ingestion_worker/worker.py.
+INGEST_QUEUE = open_queue()
+if INGEST_WORKER == "external":
+    threading.Thread(target=_follow_repository, args=(threading.Event(),),
+                     name="repository-follower", daemon=True).start()
+else:
+    start_drainer(INGEST_QUEUE, _apply_batch)
+
+
+def _webhook(default_method: str):
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "expected a JSON object"}), 400
+    amount = payload.get("amount") or 0
+    try:
+        if isinstance(amount, bool) or not isinstance(amount, (int, float, str)):
+            raise ValueError
+        amount = float(amount)
+    except ValueError:
+        return jsonify({"error": "amount must be a number"}), 400
+    if not math.isfinite(amount) or amount < 0:
+        return jsonify({"error": "amount must be a finite, non-negative number"}), 400
+    merchant = payload.get("merchant")
+    method = payload.get("method", default_method)
+    user_id = payload.get("user_id") or DEFAULT_USER_ID
+    if merchant is not None and not isinstance(merchant, str):
+        return jsonify({"error": "merchant must be a string"}), 400
+    if not isinstance(method, str) or not isinstance(user_id, str):
+        return jsonify({"error": "method and user_id must be strings"}), 400
+    account = payload.get("account") or account_tail(payload.get("text"))
+    event = {"user_id": user_id, "amount": amount, "merchant": merchant, "method": method,
+             "ts": datetime.now().isoformat()}
+    with _INGEST_LOCK:
+        # shed load before the event is logged or marked as seen, so a retry is accepted
+        if INGEST_QUEUE.full():
+            return jsonify({"error": "ingest queue is full"}), 503, {"Retry-After": "1"}
+        keys = transaction_keys(amount, merchant, account, user_id)
+        if DEDUP.check_and_add_any(*keys):
+            return jsonify({"queued": False, "duplicate": True})
+        # logged before it is queued, so nothing can apply or snapshot an event the log lacks
+        seq = EVENT_LOG.append(event)
+        try:
+            INGEST_QUEUE.put({**event, "seq": seq})
+        except BaseException as e:
+            # never applied: withdraw it from the log so replay skips it, and let the retry in
+            EVENT_LOG.cancel(seq)
+            DEDUP.discard(*keys.record)
+            if isinstance(e, QueueFull):  # a shared SQLite queue can fill from another process
+                return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
+            raise
+    return jsonify({"queued": True, "seq": seq, "queue_depth": INGEST_QUEUE.depth()}), 202
 
 
 @app.get("/health")
 def health():
-    return jsonify({"ok": True})
+    return jsonify({"ok": True, "dedup": DEDUP.stats(), "queue_depth": INGEST_QUEUE.depth(),
+                    "event_log": {"next_seq": EVENT_LOG.next_seq, "applied_seq": APPLIED_SEQ,
+                                  "snapshot_seq": SNAPSHOT_SEQ},
+                    "repository": REPOSITORY.stats()})
 
 
 @app.post("/webhook/sms")
 def webhook_sms():
-    payload = request.get_json() or {}
-    amount = float(payload.get("amount") or 0)
-    merchant = payload.get("merchant")
-    method = payload.get("method", "SMS")
-    TRANSACTIONS.append({"amount": amount, "merchant": merchant, "method": method})
-    return jsonify({"queued": True, "count": len(TRANSACTIONS)})
+    return _webhook("SMS")
 
 
 @app.post("/webhook/upi")
 def webhook_upi():
-    payload = request.get_json() or {}
-    amount = float(payload.get("amount") or 0)
-    merchant = payload.get("merchant")
-    method = payload.get("method", "UPI")
-    TRANSACTIONS.append({"amount": amount, "merchant": merchant, "method": method})
-    return jsonify({"queued": True, "count": len(TRANSACTIONS)})
+    return _webhook("UPI")
 
 
 @app.post("/webhook/receipt")
 def webhook_receipt():
-    payload = request.get_json() or {}
-    amount = float(payload.get("amount") or 0)
-    merchant = payload.get("merchant")
-    method = payload.get("method", "RECEIPT")
-    TRANSACTIONS.append({"amount": amount, "merchant": merchant, "method": method})
-    return jsonify({"queued": True, "count": len(TRANSACTIONS)})
+    return _webhook("RECEIPT")
 
 
 @app.get("/budget/gauge")
 def budget_gauge():
-    monthly_limit = float(os.getenv("MONTHLY_LIMIT", "50000"))
-    limits = {"monthly": monthly_limit}
-    gauge = compute_gauge(TRANSACTIONS, limits)
+    user_id = request.args.get("user_id") or DEFAULT_USER_ID
+    # cached per user; only a budget write goes back to the database
+    limits = {"monthly": REPOSITORY.get_budget(user_id)["monthly_limit"]}
+    gauge = (GAUGES.get(user_id) or GaugeAggregate()).gauge(limits)
     return jsonify(gauge)
 
 
+@app.post("/budget/set-limit")
+def set_budget_limit():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "expected a JSON object"}), 400
+    config = payload.get("config")
+    if config is not None and not isinstance(config, dict):
+        return jsonify({"error": "config must be an object"}), 400
+    try:
+        limit = None if payload.get("limit") is None else float(payload["limit"])
+    except (TypeError, ValueError):
+        return jsonify({"error": "limit must be a number"}), 400
+    if limit is not None and limit <= 0:
+        return jsonify({"error": "limit must be positive"}), 400
+    user_id = payload.get("user_id") or DEFAULT_USER_ID
+    budget = REPOSITORY.set_budget(user_id, limit, config)
+    return jsonify({"user_id": user_id, **budget})
+
+
+@app.get("/budget/transactions")
+def budget_transactions():
+    user_id = request.args.get("user_id") or DEFAULT_USER_ID
+    try:
+        limit = max(1, min(int(request.args.get("limit", "100")), 1000))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    # 'since'/'until' are ISO dates or timestamps (until exclusive), served by the (user_id, ts) index
+    rows = REPOSITORY.transactions(user_id, request.args.get("since", ""),
+                                   request.args.get("until") or TS_MAX, limit)
+    return jsonify(rows)
+
+
 @app.get("/")
 def index():
     return send_from_directory(app.static_folder, "index.html")
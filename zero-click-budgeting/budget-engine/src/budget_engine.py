@@ -1,6 +1,73 @@
-def compute_gauge(transactions, limits):
-    total_spend = sum(float(t.get('amount', 0) or 0) for t in transactions)
+from collections import defaultdict
+from datetime import datetime
+
+
+def _gauge(total_spend, limits):
     monthly_limit = limits.get('monthly', 1) or 1
     pct = min(100, round(100 * total_spend / monthly_limit))
     status = 'green' if pct < 70 else 'orange' if pct < 90 else 'red'
-    return { 'percent': pct, 'status': status, 'monthly_limit': monthly_limit, 'spend': total_spend }
\ No newline at end of file
+    return { 'percent': pct, 'status': status, 'monthly_limit': monthly_limit, 'spend': total_spend }
+
+
+def compute_gauge(transactions, limits):
+    total_spend = sum(float(t.get('amount', 0) or 0) for t in transactions)
+    return _gauge(total_spend, limits)
+
+
+def month_key(t):
+    # 'YYYY-MM' from whichever timestamp field the source provided; undated events count as this month
+    ts = t.get('ts') or t.get('timestamp') or t.get('date')
+    if ts:
+        return str(ts)[:7]
+    return datetime.now().strftime('%Y-%m')
+
+
+class GaugeAggregate:
+    """Running spend totals updated per transaction, so gauge reads never rescan history."""
+
+    def __init__(self, transactions=()):
+        self.total = 0.0
+        self.count = 0
+        self.by_month = defaultdict(float)
+        self.month_counts = defaultdict(int)
+        self.by_category = defaultdict(float)
+        self.by_method = defaultdict(float)
+        for t in transactions:
+            self.add(t)
+
+    def add(self, t, month=None):
+        # pass `month` when the caller has already resolved it from its own date field
+        amount = float(t.get('amount', 0) or 0)
+        month = month or month_key(t)
+        self.total += amount
+        self.count += 1
+        self.by_month[month] += amount
+        self.month_counts[month] += 1
+        self.by_category[t.get('category') or 'Others'] += amount
+        self.by_method[t.get('method') or 'Unknown'] += amount
+
+    def spent(self, month=None):
+        # (spend, transaction count) overall or for one 'YYYY-MM' month
+        if month is None:
+            return self.total, self.count
+        return self.by_month.get(month, 0.0), self.month_counts.get(month, 0)
+
+    def gauge(self, limits, month=None):
+        spend = self.total if month is None else self.by_month.get(month, 0.0)
+        return _gauge(spend, limits)
+
+    def to_dict(self):
+        return {'total': self.total, 'count': self.count, 'by_month': dict(self.by_month),
+                'month_counts': dict(self.month_counts), 'by_category': dict(self.by_category),
+                'by_method': dict(self.by_method)}
+
+    @classmethod
+    def from_dict(cls, state):
+        agg = cls()
+        agg.total = state['total']
+        agg.count = state['count']
+        agg.by_month.update(state['by_month'])
+        agg.month_counts.update(state.get('month_counts', {}))  # absent from older snapshots
+        agg.by_category.update(state['by_category'])
+        agg.by_method.update(state['by_method'])
+        return agg
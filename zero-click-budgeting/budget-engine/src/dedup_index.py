@@ -0,0 +1,115 @@
+import re
+import threading
+import time
+from collections import deque, namedtuple
+
+# "a/c XX1234", "A/c no. 1234", "card ending 5678", "acct **4321"
+ACCOUNT_TAIL_REGEX = re.compile(
+    r"(?i)\b(?:a/?c|acct|account|card)\.?(?:\s*(?:no\.?|number|ending(?:\s+in)?))?\s*[:#]?\s*[x*]*(\d{3,})\b")
+
+
+def account_tail(text):
+    """Last four digits of the account or card number mentioned in `text`, if any."""
+    if not text:
+        return None
+    m = ACCOUNT_TAIL_REGEX.search(str(text))
+    return m.group(1)[-4:] if m else None
+
+
+def fingerprint(amount, merchant, account=None, user_id=None, day=None):
+    """Identity of a transaction for duplicate detection, independent of when it arrived.
+
+    `day` is the transaction date the message itself carries, so a recurring
+    payment (same amount and merchant every month) is not a copy of last
+    month's; leave it None when the message has no date.
+    """
+    return (
+        user_id or '',
+        round(float(amount or 0), 2),
+        ' '.join(str(merchant or '').lower().split()),
+        str(account or '')[-4:],
+        str(day or ''),
+    )
+
+
+TransactionKeys = namedtuple('TransactionKeys', 'check record')
+
+
+def transaction_keys(amount, merchant, account=None, user_id=None, day=None):
+    """Fingerprints to check and to record for a transaction whose account tail may be missing.
+
+    Some channels omit the tail (an app notification next to the bank SMS), so a
+    copy without one matches a copy with any tail and vice versa, while two
+    different tails never match each other.
+    """
+    any_tail = fingerprint(amount, merchant, None, user_id, day)
+    without_tail = any_tail + ('no tail',)
+    if account:
+        exact = fingerprint(amount, merchant, account, user_id, day)
+        return TransactionKeys(check=(exact, without_tail), record=(exact, any_tail))
+    return TransactionKeys(check=(any_tail,), record=(any_tail, without_tail))
+
+
+class DuplicateIndex:
+    """Fingerprints seen in the last one to two time buckets, for O(1) duplicate checks at ingest.
+
+    Keys are (fingerprint, bucket) with bucket = arrival time // window_seconds;
+    a fingerprint counts as a duplicate if it is in the current or previous
+    bucket, so anything re-sent within `window_seconds` is always caught.
+    Older buckets are dropped as time moves on and the index never holds more
+    than `max_entries` keys, evicting the oldest first.
+    """
+
+    def __init__(self, window_seconds=300, max_entries=100_000, clock=time.time):
+        if window_seconds <= 0:
+            raise ValueError('window_seconds must be positive')
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self.checked = 0
+        self.duplicates = 0
+        self._keys = set()
+        self._order = deque()  # (bucket, key) in arrival order
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _expire(self, bucket):
+        order, keys = self._order, self._keys
+        while order and (order[0][0] < bucket - 1 or len(order) > self.max_entries):
+            keys.discard(order.popleft()[1])
+
+    def check_and_add(self, fp, ts=None):
+        """True if `fp` was seen within the window; otherwise records it and returns False."""
+        return self.check_and_add_any((fp,), (fp,), ts)
+
+    def check_and_add_any(self, check, record, ts=None):
+        """True if any fingerprint in `check` was seen within the window; otherwise records `record`."""
+        bucket = int((self.clock() if ts is None else ts) // self.window_seconds)
+        with self._lock:
+            self._expire(bucket)
+            self.checked += 1
+            keys = self._keys
+            if any((fp, bucket) in keys or (fp, bucket - 1) in keys for fp in check):
+                self.duplicates += 1
+                return True
+            for fp in record:
+                key = (fp, bucket)
+                if key not in keys:
+                    keys.add(key)
+                    self._order.append((bucket, key))
+            self._expire(bucket)
+            return False
+
+    def discard(self, *fps, ts=None):
+        """Forget fingerprints recorded by check_and_add() (e.g. when the event could not be stored after all)."""
+        bucket = int((self.clock() if ts is None else ts) // self.window_seconds)
+        with self._lock:
+            for fp in fps:
+                self._keys.discard((fp, bucket))
+                self._keys.discard((fp, bucket - 1))
+
+    def stats(self):
+        return {'entries': len(self._keys), 'checked': self.checked, 'duplicates': self.duplicates,
+                'window_seconds': self.window_seconds, 'max_entries': self.max_entries}
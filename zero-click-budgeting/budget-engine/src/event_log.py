@@ -0,0 +1,204 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+# Each record: <u32 payload length><u32 crc32 of payload><payload: UTF-8 JSON>
+HEADER = struct.Struct('<II')
+SEGMENT_SUFFIX = '.log'
+SNAPSHOT_PREFIX = 'snapshot-'
+FSYNC_POLICIES = ('always', 'interval', 'never')
+# A record {CANCEL_KEY: seq} withdraws the event logged just before it
+CANCEL_KEY = '_cancel'
+
+
+def _segment_name(first_seq):
+    return f'{first_seq:020d}{SEGMENT_SUFFIX}'
+
+
+class EventLog:
+    """Append-only, segment-rotated write-ahead log of ingest events.
+
+    Records are length-prefixed and checksummed; a torn record at the tail
+    (crash mid-write) is cut off when the log is reopened. Segments are named
+    after the sequence number of their first record and rotate once they
+    reach `segment_bytes`. Reads go through mmap.
+
+    fsync policy: 'always' syncs every append, 'interval' at most once per
+    `fsync_interval` seconds (and on close), 'never' leaves it to the OS.
+    """
+
+    def __init__(self, directory, segment_bytes=16 * 1024 * 1024, fsync='interval', fsync_interval=1.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f'fsync must be one of {FSYNC_POLICIES}, got {fsync!r}')
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._fd = None
+        self._last_sync = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        segments = self.segments()
+        if segments:
+            first_seq, path = segments[-1]
+            count, valid_bytes = self._scan(path)
+            if valid_bytes < os.path.getsize(path):
+                with open(path, 'r+b') as f:
+                    f.truncate(valid_bytes)
+            self.next_seq = first_seq + count
+            self._open_segment(path, valid_bytes)
+        else:
+            self.next_seq = 0
+            self._open_segment(os.path.join(directory, _segment_name(0)), 0)
+
+    def segments(self):
+        """[(first_seq, path)] in sequence order."""
+        out = []
+        for name in os.listdir(self.directory):
+            if name.endswith(SEGMENT_SUFFIX):
+                out.append((int(name[:-len(SEGMENT_SUFFIX)]), os.path.join(self.directory, name)))
+        return sorted(out)
+
+    def _open_segment(self, path, size):
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._size = size
+
+    @staticmethod
+    def _records(path):
+        # yields (payload bytes, end offset) for each intact record in a segment
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                off = 0
+                while off + HEADER.size <= size:
+                    length, crc = HEADER.unpack_from(mm, off)
+                    end = off + HEADER.size + length
+                    if end > size:
+                        return
+                    payload = mm[off + HEADER.size:end]
+                    if zlib.crc32(payload) != crc:
+                        return
+                    yield payload, end
+                    off = end
+
+    def _scan(self, path):
+        count, valid = 0, 0
+        for _, end in self._records(path):
+            count += 1
+            valid = end
+        return count, valid
+
+    def append(self, event):
+        """Write one event; returns its sequence number."""
+        payload = json.dumps(event, separators=(',', ':')).encode('utf-8')
+        record = HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        with self._lock:
+            if self._size and self._size + len(record) > self.segment_bytes:
+                self._sync()
+                self._open_segment(os.path.join(self.directory, _segment_name(self.next_seq)), 0)
+            os.write(self._fd, record)
+            self._size += len(record)
+            seq = self.next_seq
+            self.next_seq += 1
+            if self.fsync == 'always' or (
+                    self.fsync == 'interval' and time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync()
+            return seq
+
+    def cancel(self, seq):
+        """Record that event `seq` was never applied (e.g. it could not be queued); events() skips it."""
+        return self.append({CANCEL_KEY: seq})
+
+    def advance_to(self, seq):
+        """Continue numbering at `seq` (in a new segment) if the log is behind it.
+
+        Used on start when a snapshot or database already covers sequence
+        numbers the log lost (an unsynced tail), so they are never reused.
+        """
+        with self._lock:
+            if seq <= self.next_seq:
+                return
+            self._sync()
+            self._open_segment(os.path.join(self.directory, _segment_name(seq)), 0)
+            self.next_seq = seq
+
+    def _sync(self):
+        os.fsync(self._fd)
+        self._last_sync = time.monotonic()
+
+    def replay(self, from_seq=0):
+        """Yield (seq, event) for every record with seq >= from_seq."""
+        segments = self.segments()
+        for i, (first_seq, path) in enumerate(segments):
+            if i + 1 < len(segments) and segments[i + 1][0] <= from_seq:
+                continue  # the whole segment is before from_seq
+            seq = first_seq
+            for payload, _ in self._records(path):
+                if seq >= from_seq:
+                    yield seq, json.loads(payload)
+                seq += 1
+
+    def events(self, from_seq=0):
+        """Like replay(), without cancel records and the events they cancel."""
+        pending = None
+        for seq, event in self.replay(from_seq):
+            if CANCEL_KEY in event:
+                if pending is not None and pending[0] == event[CANCEL_KEY]:
+                    pending = None
+                continue
+            if pending is not None:
+                yield pending
+            pending = (seq, event)
+        if pending is not None:
+            yield pending
+
+    def drop_segments_before(self, seq):
+        """Delete closed segments whose records all precede `seq` (e.g. covered by a snapshot)."""
+        segments = self.segments()
+        removed = 0
+        for (first_seq, path), (next_first, _) in zip(segments, segments[1:]):
+            if next_first <= seq:
+                os.remove(path)
+                removed += 1
+        return removed
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                if self.fsync != 'never':
+                    self._sync()
+                os.close(self._fd)
+                self._fd = None
+
+
+def write_snapshot(directory, seq, state):
+    """Atomically store `state` as covering every event with sequence number < seq."""
+    path = os.path.join(directory, f'{SNAPSHOT_PREFIX}{seq:020d}.json')
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'seq': seq, 'state': state}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    for name in os.listdir(directory):
+        if name.startswith(SNAPSHOT_PREFIX) and name.endswith('.json') and os.path.join(directory, name) != path:
+            os.remove(os.path.join(directory, name))
+    return path
+
+
+def load_snapshot(directory):
+    """(seq, state) from the newest snapshot, or (0, None)."""
+    names = sorted(n for n in os.listdir(directory) if n.startswith(SNAPSHOT_PREFIX) and n.endswith('.json'))
+    if not names:
+        return 0, None
+    with open(os.path.join(directory, names[-1])) as f:
+        snap = json.load(f)
+    return snap['seq'], snap['state']
@@ -0,0 +1,207 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+log = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised by put() when the queue is at capacity; callers should shed load (e.g. HTTP 503)."""
+
+
+class MemoryQueue:
+    """Bounded in-process queue of ingest events."""
+
+    def __init__(self, maxsize=10_000):
+        self.maxsize = maxsize
+        self._q = queue.Queue(maxsize=maxsize)
+
+    def put(self, event):
+        try:
+            self._q.put_nowait(event)
+        except queue.Full:
+            raise QueueFull(f'ingest queue is full ({self.maxsize} events)') from None
+
+    def get_batch(self, max_items=500, timeout=1.0):
+        """Up to max_items (token, event) pairs, waiting at most `timeout` for the first."""
+        try:
+            first = self._q.get(timeout=timeout)
+        except queue.Empty:
+            return []
+        batch = [(None, first)]
+        while len(batch) < max_items:
+            try:
+                batch.append((None, self._q.get_nowait()))
+            except queue.Empty:
+                break
+        return batch
+
+    def ack(self, batch):
+        # events leave the queue when taken; nothing to confirm
+        pass
+
+    def depth(self):
+        return self._q.qsize()
+
+    def full(self):
+        return self._q.full()
+
+
+class SQLiteQueue:
+    """Bounded queue in a SQLite table, shared between processes and kept across restarts.
+
+    Events stay in the table until ack(); a consumer that dies mid-batch
+    gets the same events again (at-least-once delivery).
+    """
+
+    SCHEMA = ('CREATE TABLE IF NOT EXISTS ingest_queue ('
+              'id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, enqueued_at REAL NOT NULL)')
+
+    def __init__(self, path, maxsize=10_000, poll_interval=0.05):
+        self.path = path
+        self.maxsize = maxsize
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        self._conn().execute(self.SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            self._local.conn = conn
+        return conn
+
+    def depth(self):
+        # ids are handed out in order and acked from the front, so the span is the depth
+        lo, hi = self._conn().execute('SELECT MIN(id), MAX(id) FROM ingest_queue').fetchone()
+        return 0 if lo is None else hi - lo + 1
+
+    def full(self):
+        return self.depth() >= self.maxsize
+
+    def put(self, event):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if self.full():
+                raise QueueFull(f'ingest queue is full ({self.maxsize} events)')
+            conn.execute('INSERT INTO ingest_queue (payload, enqueued_at) VALUES (?, ?)',
+                         (json.dumps(event), time.time()))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def get_batch(self, max_items=500, timeout=1.0):
+        deadline = time.monotonic() + timeout
+        conn = self._conn()
+        while True:
+            rows = conn.execute('SELECT id, payload FROM ingest_queue ORDER BY id LIMIT ?', (max_items,)).fetchall()
+            if rows or time.monotonic() >= deadline:
+                return [(row_id, json.loads(payload)) for row_id, payload in rows]
+            time.sleep(self.poll_interval)
+
+    def ack(self, batch):
+        if batch:
+            self._conn().execute('DELETE FROM ingest_queue WHERE id <= ?', (batch[-1][0],))
+
+
+def open_queue(spec=None, maxsize=None, env='INGEST_QUEUE'):
+    """Queue from a spec string: 'memory' (default) or 'sqlite:<path>'.
+
+    Defaults come from the `env` variable and `env`_MAXSIZE, so services whose
+    events have different shapes can be pointed at different queues.
+    """
+    spec = spec or os.getenv(env, 'memory')
+    maxsize = maxsize or int(os.getenv(f'{env}_MAXSIZE', '10000'))
+    if spec == 'memory':
+        return MemoryQueue(maxsize)
+    if spec.startswith('sqlite:'):
+        return SQLiteQueue(spec[len('sqlite:'):], maxsize)
+    raise ValueError(f"unknown ingest queue {spec!r}; expected 'memory' or 'sqlite:<path>'")
+
+
+class EventApplier:
+    """drain() handler that applies events one at a time and never counts one twice.
+
+    Events carry an 'id'. Ids of applied events are remembered (the most
+    recent `remember` of them), so when drain() retries a batch after a
+    failure the events that already went through are skipped. An event whose
+    apply_one() raises fails the batch, so drain() retries it with backoff, up
+    to max_attempts times; then it is moved to `dead_letters` and the rest of
+    the queue moves on. Events without an id are dead-lettered on first failure.
+    """
+
+    def __init__(self, apply_one, max_attempts=3, remember=10_000, max_dead_letters=1000):
+        self.apply_one = apply_one
+        self.max_attempts = max_attempts
+        self.remember = remember
+        self.dead_letters = deque(maxlen=max_dead_letters)
+        self.applied = 0
+        self._applied_ids = OrderedDict()
+        self._attempts = {}
+
+    def __call__(self, events):
+        for event in events:
+            event_id = event.get('id') if isinstance(event, dict) else None
+            if event_id is not None and event_id in self._applied_ids:
+                continue
+            try:
+                self.apply_one(event)
+                self.applied += 1
+            except Exception as e:
+                attempts = self._attempts.pop(event_id, 0) + 1
+                if event_id is not None and attempts < self.max_attempts:
+                    self._attempts[event_id] = attempts
+                    raise
+                log.exception('dead-lettering ingest event %s after %d attempt(s)', event_id, attempts)
+                self.dead_letters.append({'event': event, 'error': repr(e), 'attempts': attempts})
+            if event_id is not None:
+                self._applied_ids[event_id] = None
+                if len(self._applied_ids) > self.remember:
+                    self._applied_ids.popitem(last=False)
+
+    def stats(self):
+        return {'applied': self.applied, 'dead_letters': len(self.dead_letters)}
+
+
+def drain(q, handler, batch_size=500, timeout=1.0, stop=None, max_backoff=30.0):
+    """Feed queued events to handler(list_of_events) in batches until `stop` is set.
+
+    A batch is acked only after the handler returns. If it raises, the same
+    batch is retried with exponential backoff; meanwhile the queue fills and
+    producers get QueueFull, which is the backpressure signal.
+    """
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        batch = q.get_batch(batch_size, timeout)
+        if not batch:
+            continue
+        backoff = 0.1
+        while True:
+            try:
+                handler([event for _, event in batch])
+                break
+            except Exception:
+                log.exception('ingest batch of %d events failed; retrying in %.1fs', len(batch), backoff)
+                if stop.wait(backoff):
+                    return
+                backoff = min(backoff * 2, max_backoff)
+        q.ack(batch)
+
+
+def start_drainer(q, handler, batch_size=500, timeout=0.2):
+    """Run drain() on a daemon thread; returns (thread, stop_event)."""
+    stop = threading.Event()
+    thread = threading.Thread(target=drain, args=(q, handler, batch_size, timeout, stop),
+                              name='ingest-drainer', daemon=True)
+    thread.start()
+    return thread, stop
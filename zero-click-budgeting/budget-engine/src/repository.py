@@ -0,0 +1,145 @@
+import json
+import os
+import sqlite3
+import threading
+
+from sqlite_migrations import migrate
+
+MIGRATIONS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'db', 'migrations'))
+
+# Fixed SQL text with ? placeholders: sqlite3 keeps each statement prepared in
+# the connection's statement cache, so repeated calls skip parsing and planning.
+INSERT_TRANSACTION = ('INSERT OR IGNORE INTO transactions (user_id, ts, source, merchant, category, amount, event_seq) '
+                      'VALUES (?, ?, ?, ?, ?, ?, ?)')
+SELECT_TRANSACTIONS = ('SELECT id, user_id, ts, source, merchant, category, amount, event_seq FROM transactions '
+                       'WHERE user_id = ? AND ts >= ? AND ts < ? ORDER BY ts LIMIT ?')
+SELECT_AFTER_ID = ('SELECT id, user_id, ts, source, merchant, category, amount, event_seq FROM transactions '
+                   'WHERE id > ? ORDER BY id LIMIT ?')
+SELECT_SPEND = 'SELECT COALESCE(SUM(amount), 0), COUNT(*) FROM transactions WHERE user_id = ? AND ts >= ? AND ts < ?'
+SELECT_MAX_EVENT_SEQ = 'SELECT MAX(event_seq) FROM transactions'
+SELECT_BUDGET = 'SELECT monthly_limit, config FROM budgets WHERE user_id = ?'
+UPSERT_BUDGET = ('INSERT INTO budgets (user_id, monthly_limit, config) VALUES (?, ?, ?) '
+                 'ON CONFLICT (user_id) DO UPDATE SET monthly_limit = excluded.monthly_limit, config = excluded.config')
+
+# sorts after any ISO timestamp, for open-ended ranges
+TS_MAX = '\uffff'
+
+TRANSACTION_COLUMNS = ('id', 'user_id', 'ts', 'source', 'merchant', 'category', 'amount', 'event_seq')
+
+
+def sqlite_path(url, base_dir='.'):
+    """Filesystem path from a DB_URL such as 'sqlite:///db/zero_click.db' (relative to base_dir)."""
+    if not url.startswith('sqlite:///'):
+        raise ValueError(f'unsupported DB_URL {url!r}; expected sqlite:///<path>')
+    path = url[len('sqlite:///'):]
+    return path if os.path.isabs(path) else os.path.join(base_dir, path)
+
+
+def _row(tx, user_id):
+    return (tx.get('user_id') or user_id, tx.get('ts'), tx.get('source') or tx.get('method'),
+            tx.get('merchant'), tx.get('category'), float(tx.get('amount', 0) or 0), tx.get('seq'))
+
+
+class BudgetRepository:
+    """Webhook transactions and per-user budgets in the SQLite schema built by db/migrations.
+
+    Budget configs are cached per user after the first read; set_budget()
+    drops the cached entry, so only writes through this repository are seen
+    by its cache. Connections are per thread.
+    """
+
+    def __init__(self, path, default_limit=50000.0, migrations_dir=MIGRATIONS_DIR):
+        self.path = path
+        self.default_limit = default_limit
+        self._local = threading.local()
+        self._budgets = {}
+        self._budgets_lock = threading.Lock()
+        self._budget_writes = 0  # bumped by set_budget so a read racing a write is not cached
+        self.budget_hits = 0
+        self.budget_misses = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        migrate(self._conn(), migrations_dir)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            self._local.conn = conn
+        return conn
+
+    def add_transactions(self, transactions, user_id=None):
+        """Insert many transactions in one write transaction; returns the number stored.
+
+        A transaction's 'seq' (event log sequence number) is stored as
+        event_seq, and a row whose event_seq is already present is skipped.
+        """
+        rows = [_row(tx, user_id) for tx in transactions]
+        if not rows:
+            return 0
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            before = conn.total_changes
+            conn.executemany(INSERT_TRANSACTION, rows)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return conn.total_changes - before
+
+    def transactions(self, user_id, since='', until=TS_MAX, limit=1000):
+        """A user's transactions with since <= ts < until (ISO strings), oldest first."""
+        rows = self._conn().execute(SELECT_TRANSACTIONS, (user_id, since, until, limit)).fetchall()
+        return [dict(zip(TRANSACTION_COLUMNS, row)) for row in rows]
+
+    def transactions_after(self, after_id, limit=5000):
+        """Up to `limit` transactions of any user with id > after_id, in insertion order."""
+        rows = self._conn().execute(SELECT_AFTER_ID, (after_id, limit)).fetchall()
+        return [dict(zip(TRANSACTION_COLUMNS, row)) for row in rows]
+
+    def spend(self, user_id, since='', until=TS_MAX):
+        """(total amount, count) of a user's transactions with since <= ts < until."""
+        total, count = self._conn().execute(SELECT_SPEND, (user_id, since, until)).fetchone()
+        return total, count
+
+    def next_event_seq(self):
+        """One past the highest event log sequence number stored, i.e. where replay should resume."""
+        (seq,) = self._conn().execute(SELECT_MAX_EVENT_SEQ).fetchone()
+        return 0 if seq is None else seq + 1
+
+    def get_budget(self, user_id):
+        """{'monthly_limit', 'config'} for a user; users without a row get default_limit."""
+        with self._budgets_lock:
+            budget = self._budgets.get(user_id)
+            if budget is not None:
+                self.budget_hits += 1
+                return budget
+            self.budget_misses += 1
+            writes = self._budget_writes
+        row = self._conn().execute(SELECT_BUDGET, (user_id,)).fetchone()
+        monthly_limit, config = row if row else (None, None)
+        budget = {'monthly_limit': self.default_limit if monthly_limit is None else monthly_limit,
+                  'config': json.loads(config or '{}')}
+        with self._budgets_lock:
+            if writes == self._budget_writes:
+                self._budgets[user_id] = budget
+        return budget
+
+    def set_budget(self, user_id, monthly_limit=None, config=None):
+        """Create or update a user's budget; omitted fields keep their current value."""
+        current = self.get_budget(user_id)
+        monthly_limit = current['monthly_limit'] if monthly_limit is None else float(monthly_limit)
+        config = current['config'] if config is None else config
+        self._conn().execute(UPSERT_BUDGET, (user_id, monthly_limit, json.dumps(config)))
+        with self._budgets_lock:
+            self._budget_writes += 1
+            self._budgets.pop(user_id, None)
+        return self.get_budget(user_id)
+
+    def stats(self):
+        return {'cached_budgets': len(self._budgets), 'budget_hits': self.budget_hits,
+                'budget_misses': self.budget_misses}
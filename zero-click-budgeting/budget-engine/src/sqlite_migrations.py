@@ -0,0 +1,183 @@
+"""Versioned forward migrations for the SQLite databases (zero-click and insights).
+
+A migrations directory holds files named NNNN_description.sql or
+NNNN_description.py, applied in version order to any database whose
+schema_version table does not list them yet:
+
+- .sql files run statement by statement in one BEGIN IMMEDIATE transaction
+  together with their schema_version row, so they apply completely or not at
+  all, and a process that loses the race to apply one simply skips it.
+- .py files define upgrade(conn) and manage their own transactions, which is
+  what long-running steps such as create_index_online() need. They are recorded
+  only after upgrade() returns, so they must be safe to run again.
+
+    python sqlite_migrations.py <db path> <migrations dir> [--target N]
+"""
+import argparse
+import importlib.util
+import os
+import re
+import sqlite3
+import time
+from collections import namedtuple
+from datetime import datetime
+
+MIGRATION_FILE = re.compile(r'^(\d+)_(\w+)\.(sql|py)$')
+SCHEMA_VERSION_TABLE = ('CREATE TABLE IF NOT EXISTS schema_version ('
+                        'version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at TEXT NOT NULL)')
+
+Migration = namedtuple('Migration', 'version name path')
+
+
+def discover(directory):
+    """[Migration] found in `directory`, ordered by version."""
+    found = {}
+    for filename in os.listdir(directory):
+        m = MIGRATION_FILE.match(filename)
+        if not m:
+            continue
+        version = int(m.group(1))
+        if version in found:
+            raise ValueError(f'duplicate migration version {version}: '
+                             f'{os.path.basename(found[version].path)} and {filename}')
+        found[version] = Migration(version, m.group(2), os.path.join(directory, filename))
+    return [found[v] for v in sorted(found)]
+
+
+def applied_versions(conn):
+    """Versions listed in schema_version (the table is created if missing)."""
+    conn.execute(SCHEMA_VERSION_TABLE)
+    if conn.in_transaction:
+        conn.commit()
+    return {v for (v,) in conn.execute('SELECT version FROM schema_version')}
+
+
+def split_statements(script):
+    """Individual statements of an SQL script (trigger bodies stay whole)."""
+    statements, buf = [], ''
+    for piece in script.split(';'):
+        buf += piece + ';'
+        if sqlite3.complete_statement(buf):
+            if buf.strip(' \t\r\n;'):
+                statements.append(buf.strip())
+            buf = ''
+    if buf.strip(' \t\r\n;'):
+        raise ValueError(f'incomplete SQL statement: {buf.strip()[:60]!r}')
+    return statements
+
+
+def _record(conn, migration):
+    conn.execute('INSERT OR IGNORE INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)',
+                 (migration.version, migration.name, datetime.now().isoformat(timespec='seconds')))
+
+
+def _apply_sql(conn, migration):
+    with open(migration.path) as f:
+        statements = split_statements(f.read())
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        if conn.execute('SELECT 1 FROM schema_version WHERE version = ?', (migration.version,)).fetchone():
+            conn.execute('ROLLBACK')  # applied by another process meanwhile
+            return False
+        for statement in statements:
+            conn.execute(statement)
+        _record(conn, migration)
+        conn.execute('COMMIT')
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    return True
+
+
+def _apply_py(conn, migration):
+    spec = importlib.util.spec_from_file_location(f'migration_{migration.version:04d}_{migration.name}', migration.path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.upgrade(conn)
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute('BEGIN IMMEDIATE')
+    _record(conn, migration)
+    conn.execute('COMMIT')
+    return True
+
+
+def migrate(conn, directory, target=None, log=None):
+    """Apply the migrations in `directory` that this database lacks, up to `target`.
+
+    Returns the Migrations applied by this call. `log`, if given, is called
+    with one line per applied migration.
+    """
+    done = applied_versions(conn)
+    applied = []
+    for migration in discover(directory):
+        if target is not None and migration.version > target:
+            break
+        if migration.version in done:
+            continue
+        started = time.perf_counter()
+        apply = _apply_sql if migration.path.endswith('.sql') else _apply_py
+        if apply(conn, migration):
+            applied.append(migration)
+            if log:
+                log(f'applied {os.path.basename(migration.path)} in {time.perf_counter() - started:.2f}s')
+    return applied
+
+
+def index_exists(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)).fetchone() is not None
+
+
+def create_index_online(conn, name, table, columns, unique=False, where=None, batch_size=50_000):
+    """Create an index on a possibly large table while keeping it writable.
+
+    SQLite builds an index in one statement under the write lock, so the build
+    itself cannot be split. What runs before it is: the indexed columns are
+    read in rowid batches, each its own short read (no lock that blocks
+    writers, no long-lived snapshot holding back WAL checkpoints), so the
+    table is in the page cache and the locked build is mostly sorting. The
+    build is then its own BEGIN IMMEDIATE transaction, apart from any other
+    migration step. Returns the seconds the write lock was held (0.0 when the
+    index already exists).
+    """
+    if index_exists(conn, name):
+        return 0.0
+    cols = ', '.join(columns)
+    last = None
+    while True:
+        row = conn.execute(f'SELECT MAX(rowid), COUNT(*) FROM (SELECT rowid, {cols} FROM {table} '
+                           f'WHERE rowid > ? ORDER BY rowid LIMIT ?)',
+                           (-2 ** 63 if last is None else last, batch_size)).fetchone()
+        if not row[1]:
+            break
+        last = row[0]
+    if conn.in_transaction:
+        conn.commit()
+    started = time.perf_counter()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({cols})"
+                     + (f' WHERE {where}' if where else ''))
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='apply SQLite schema migrations')
+    parser.add_argument('db')
+    parser.add_argument('directory')
+    parser.add_argument('--target', type=int, default=None, help='stop after this version')
+    args = parser.parse_args(argv)
+    conn = sqlite3.connect(args.db)
+    conn.execute('PRAGMA busy_timeout=5000')
+    applied = migrate(conn, args.directory, args.target, log=print)
+    print(f'{args.db}: {len(applied)} migration(s) applied, at version {max(applied_versions(conn), default=0)}')
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
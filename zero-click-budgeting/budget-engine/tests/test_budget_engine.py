@@ -1,8 +1,39 @@
-from src.budget_engine import compute_gauge
+from src.budget_engine import compute_gauge, GaugeAggregate
 
 def test_basic_gauge():
     tx = [{ 'amount': 1000 }, { 'amount': 900 }]
     limits = { 'monthly': 5000 }
     g = compute_gauge(tx, limits)
     assert g['percent'] == 38
-    assert g['status'] in ('green','orange','red')
\ No newline at end of file
+    assert g['status'] in ('green','orange','red')
+
+def test_aggregate_matches_full_scan():
+    tx = [
+        { 'amount': 1000, 'method': 'SMS', 'category': 'Food', 'ts': '2024-01-05T10:00:00' },
+        { 'amount': 900, 'method': 'UPI', 'category': 'Food', 'ts': '2024-02-01T09:00:00' },
+        { 'amount': 250, 'method': 'UPI', 'ts': '2024-02-03T12:00:00' },
+    ]
+    limits = { 'monthly': 5000 }
+    agg = GaugeAggregate()
+    for t in tx:
+        agg.add(t)
+    assert agg.gauge(limits) == compute_gauge(tx, limits)
+    assert agg.count == 3
+    assert agg.by_month['2024-02'] == 1150
+    assert agg.by_category['Food'] == 1900
+    assert agg.by_category['Others'] == 250
+    assert agg.by_method['UPI'] == 1150
+    assert agg.gauge(limits, month='2024-01')['spend'] == 1000
+    assert agg.gauge(limits, month='2023-12')['spend'] == 0
+
+def test_aggregate_spent_counts_per_month_and_takes_a_resolved_month():
+    agg = GaugeAggregate([{ 'amount': 100, 'ts': '2024-03-02' }, { 'amount': 50, 'ts': '2024-03-09' }])
+    agg.add({ 'amount': 20, 'timestamp': 'Apr 1 2024' }, month='2024-04')
+    assert agg.spent() == (170, 3)
+    assert agg.spent('2024-03') == (150, 2)
+    assert agg.spent('2024-04') == (20, 1)
+    assert agg.spent('2024-05') == (0, 0)
+    older = agg.to_dict()
+    del older['month_counts']
+    assert GaugeAggregate.from_dict(older).spent('2024-03') == (150, 0)
+    assert GaugeAggregate.from_dict(agg.to_dict()).to_dict() == agg.to_dict()
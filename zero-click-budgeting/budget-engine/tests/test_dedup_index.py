@@ -0,0 +1,51 @@
+from src.dedup_index import DuplicateIndex, account_tail, fingerprint, transaction_keys
+
+def test_duplicates_within_window_only():
+    now = [1000.0]
+    idx = DuplicateIndex(window_seconds=60, clock=lambda: now[0])
+    fp = fingerprint(250, '  Zomato ', account_tail('Rs 250 debited from a/c XX1234'))
+    assert fp == fingerprint(250.0, 'zomato', '1234')
+    assert not idx.check_and_add(fp)
+    now[0] += 59
+    assert idx.check_and_add(fp)
+    assert not idx.check_and_add(fingerprint(250, 'zomato', '9999'))
+    now[0] += 200
+    assert not idx.check_and_add(fp)
+    assert idx.stats()['duplicates'] == 1
+
+def test_memory_is_bounded():
+    idx = DuplicateIndex(window_seconds=60, max_entries=10, clock=lambda: 0.0)
+    for i in range(100):
+        idx.check_and_add(fingerprint(i, 'uber'))
+    assert len(idx) == 10
+    assert idx.check_and_add(fingerprint(99, 'uber'))
+    assert not idx.check_and_add(fingerprint(0, 'uber'))
+
+def test_account_tail():
+    assert account_tail('Card ending 5678 used at Amazon') == '5678'
+    assert account_tail('A/c no. 001234567890 credited') == '7890'
+    assert account_tail('Rs 500 at Uber') is None
+
+def test_discard_lets_a_retry_through():
+    idx = DuplicateIndex(window_seconds=60, clock=lambda: 1000.0)
+    fp = fingerprint(250, 'zomato', '1234')
+    assert not idx.check_and_add(fp)
+    idx.discard(fp)
+    assert not idx.check_and_add(fp)
+    assert idx.check_and_add(fp)
+
+def test_copy_without_account_tail_matches_either_way():
+    idx = DuplicateIndex(window_seconds=60, clock=lambda: 1000.0)
+    assert not idx.check_and_add_any(*transaction_keys(250, 'zomato', '1234'))
+    assert idx.check_and_add_any(*transaction_keys(250, 'zomato', None))
+    assert not idx.check_and_add_any(*transaction_keys(250, 'zomato', '9999'))
+    assert not idx.check_and_add_any(*transaction_keys(99, 'uber', None))
+    assert idx.check_and_add_any(*transaction_keys(99, 'uber', '5678'))
+    idx.discard(*transaction_keys(99, 'uber', None).record)
+    assert not idx.check_and_add_any(*transaction_keys(99, 'uber', '5678'))
+
+def test_same_payment_on_another_day_is_not_a_duplicate():
+    idx = DuplicateIndex(window_seconds=60, clock=lambda: 1000.0)
+    assert not idx.check_and_add_any(*transaction_keys(649, 'netflix', None, day='2024-08-01'))
+    assert not idx.check_and_add_any(*transaction_keys(649, 'netflix', None, day='2024-09-01'))
+    assert idx.check_and_add_any(*transaction_keys(649, 'netflix', '1234', day='2024-09-01'))
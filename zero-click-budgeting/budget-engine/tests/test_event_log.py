@@ -0,0 +1,59 @@
+import os
+
+from src.budget_engine import GaugeAggregate
+from src.event_log import EventLog, load_snapshot, write_snapshot
+
+def test_append_replay_and_rotation(tmp_path):
+    log = EventLog(str(tmp_path), segment_bytes=200, fsync='never')
+    seqs = [log.append({'amount': i, 'merchant': 'uber'}) for i in range(20)]
+    assert seqs == list(range(20))
+    assert len(log.segments()) > 1
+    assert [e['amount'] for _, e in log.replay(15)] == [15, 16, 17, 18, 19]
+    log.close()
+    reopened = EventLog(str(tmp_path), segment_bytes=200)
+    assert reopened.next_seq == 20
+    assert reopened.append({'amount': 20}) == 20
+
+def test_torn_tail_is_truncated(tmp_path):
+    log = EventLog(str(tmp_path), fsync='always')
+    log.append({'amount': 1})
+    log.append({'amount': 2})
+    log.close()
+    path = log.segments()[-1][1]
+    with open(path, 'ab') as f:
+        f.write(b'\x10\x00\x00\x00garbage')  # header of a record that never finished
+    reopened = EventLog(str(tmp_path))
+    assert reopened.next_seq == 2
+    assert reopened.append({'amount': 3}) == 2
+    assert [e['amount'] for _, e in reopened.replay()] == [1, 2, 3]
+
+def test_snapshot_plus_replay_rebuilds_gauge(tmp_path):
+    log = EventLog(str(tmp_path), segment_bytes=150, fsync='never')
+    events = [{'amount': 100 + i, 'category': 'Food', 'ts': '2024-09-0%d' % (i % 9 + 1)} for i in range(12)]
+    live = GaugeAggregate()
+    for i, e in enumerate(events):
+        log.append(e)
+        live.add(e)
+        if i == 6:
+            write_snapshot(str(tmp_path), 7, live.to_dict())
+    log.drop_segments_before(7)
+    seq, state = load_snapshot(str(tmp_path))
+    rebuilt = GaugeAggregate.from_dict(state)
+    for _, e in log.replay(seq):
+        rebuilt.add(e)
+    assert rebuilt.to_dict() == live.to_dict()
+    assert len([n for n in os.listdir(tmp_path) if n.startswith('snapshot-')]) == 1
+
+def test_cancelled_events_are_skipped_and_advance_never_reuses_seqs(tmp_path):
+    log = EventLog(str(tmp_path), fsync='never')
+    log.append({'amount': 1})
+    bad = log.append({'amount': 2})
+    log.cancel(bad)
+    log.append({'amount': 3})
+    assert [e['amount'] for _, e in log.events()] == [1, 3]
+    log.advance_to(10)
+    assert log.append({'amount': 4}) == 10
+    log.close()
+    reopened = EventLog(str(tmp_path))
+    assert reopened.next_seq == 11
+    assert [(s, e['amount']) for s, e in reopened.events(3)] == [(3, 3), (10, 4)]
@@ -0,0 +1,78 @@
+import importlib.util
+import os
+
+import pytest
+
+from src.ingest_queue import MemoryQueue, QueueFull, SQLiteQueue, drain, open_queue
+
+WORKER = os.path.join(os.path.dirname(__file__), '..', '..', 'workers', 'ingestion_worker', 'worker.py')
+
+@pytest.mark.parametrize('kind', ['memory', 'sqlite'])
+def test_bounded_batches_and_ack(kind, tmp_path):
+    q = MemoryQueue(3) if kind == 'memory' else SQLiteQueue(str(tmp_path / 'q.db'), 3)
+    for i in range(3):
+        q.put({'i': i})
+    with pytest.raises(QueueFull):
+        q.put({'i': 3})
+    batch = q.get_batch(2, timeout=0.1)
+    assert [e['i'] for _, e in batch] == [0, 1]
+    q.ack(batch)
+    assert q.depth() == 1
+    assert q.get_batch(5, timeout=0.1)[0][1] == {'i': 2}
+
+def test_open_queue_reads_the_named_environment_variable(tmp_path, monkeypatch):
+    monkeypatch.setenv('INGEST_QUEUE', 'sqlite:' + str(tmp_path / 'api.db'))
+    monkeypatch.setenv('OTHER_QUEUE_MAXSIZE', '2')
+    assert isinstance(open_queue(), SQLiteQueue)
+    other = open_queue(env='OTHER_QUEUE')
+    assert isinstance(other, MemoryQueue) and other.maxsize == 2
+
+def test_ingestion_worker_refuses_a_queue_it_cannot_share(monkeypatch):
+    spec = importlib.util.spec_from_file_location('ingestion_worker', WORKER)
+    worker = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(worker)
+    monkeypatch.delenv('INGEST_QUEUE', raising=False)
+    for queue_spec in (None, 'memory'):
+        with pytest.raises(ValueError, match='INGEST_QUEUE=sqlite:'):
+            worker.run(queue_spec)
+
+def test_sqlite_queue_redelivers_unacked(tmp_path):
+    path = str(tmp_path / 'q.db')
+    SQLiteQueue(path).put({'amount': 10})
+    assert SQLiteQueue(path).get_batch(10, timeout=0.1)[0][1] == {'amount': 10}
+    q = SQLiteQueue(path)
+    q.ack(q.get_batch(10, timeout=0.1))
+    assert q.depth() == 0
+
+def test_drain_retries_failed_batch():
+    import threading
+    q, stop, seen = MemoryQueue(), threading.Event(), []
+
+    def handler(events):
+        seen.append(list(events))
+        if len(seen) == 1:
+            raise RuntimeError('store unavailable')
+        stop.set()
+
+    q.put({'amount': 5})
+    drain(q, handler, timeout=0.05, stop=stop)
+    assert seen == [[{'amount': 5}], [{'amount': 5}]]
+
+def test_event_applier_skips_applied_and_dead_letters_poison():
+    from src.ingest_queue import EventApplier
+    seen = []
+
+    def apply_one(event):
+        if event['amount'] == 'bad':
+            raise ValueError('bad amount')
+        seen.append(event['id'])
+
+    applier = EventApplier(apply_one, max_attempts=3)
+    batch = [{'id': 'a', 'amount': 1}, {'id': 'p', 'amount': 'bad'}, {'id': 'b', 'amount': 2}]
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            applier(batch)
+    applier(batch)
+    assert seen == ['a', 'b']
+    assert [d['event']['id'] for d in applier.dead_letters] == ['p']
+    assert applier.stats() == {'applied': 2, 'dead_letters': 1}
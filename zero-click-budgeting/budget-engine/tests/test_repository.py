@@ -0,0 +1,35 @@
+from src.repository import BudgetRepository, sqlite_path
+
+def test_bulk_insert_is_idempotent_per_event_seq(tmp_path):
+    repo = BudgetRepository(str(tmp_path / 'zc.db'))
+    events = [{'amount': 100 + i, 'merchant': 'uber', 'method': 'UPI', 'ts': '2024-09-%02dT10:00:00' % (i + 1), 'seq': i}
+              for i in range(5)]
+    assert repo.add_transactions(events, 'demo') == 5
+    assert repo.add_transactions(events[3:] + [{'amount': 1, 'ts': '2024-10-01', 'seq': 5}], 'demo') == 1
+    assert repo.next_event_seq() == 6
+    rows = repo.transactions('demo', '2024-09-02', '2024-09-04')
+    assert [r['amount'] for r in rows] == [101, 102]
+    assert rows[0]['source'] == 'UPI'
+    assert repo.spend('demo', '2024-09', '2024-10') == (510, 5)
+    assert repo.transactions('someone-else') == []
+
+def test_budget_cache_invalidated_on_write(tmp_path):
+    repo = BudgetRepository(str(tmp_path / 'zc.db'), default_limit=1000)
+    assert repo.get_budget('u1') == {'monthly_limit': 1000, 'config': {}}
+    repo.get_budget('u1')
+    assert repo.stats()['budget_hits'] == 1
+    assert repo.set_budget('u1', 2500)['monthly_limit'] == 2500
+    assert repo.set_budget('u1', config={'alerts': False}) == {'monthly_limit': 2500, 'config': {'alerts': False}}
+    # a fresh repository (e.g. after a restart) reads the stored row
+    assert BudgetRepository(repo.path).get_budget('u1')['monthly_limit'] == 2500
+
+def test_sqlite_path():
+    assert sqlite_path('sqlite:///db/zero_click.db', '/srv/zc') == '/srv/zc/db/zero_click.db'
+    assert sqlite_path('sqlite:////tmp/zc.db', '/srv/zc') == '/tmp/zc.db'
+
+def test_transactions_after_pages_in_insertion_order(tmp_path):
+    repo = BudgetRepository(str(tmp_path / 'zc.db'))
+    repo.add_transactions([{'amount': i, 'ts': '2024-09-0%d' % (9 - i), 'user_id': 'u%d' % (i % 2)} for i in range(5)])
+    first = repo.transactions_after(0, limit=3)
+    assert [r['amount'] for r in first] == [0, 1, 2]
+    assert [r['amount'] for r in repo.transactions_after(first[-1]['id'])] == [3, 4]
@@ -0,0 +1,53 @@
+import sqlite3
+
+import pytest
+
+from src.sqlite_migrations import applied_versions, create_index_online, discover, index_exists, migrate, split_statements
+
+def _write(directory, files):
+    for name, body in files.items():
+        (directory / name).write_text(body)
+
+def test_applies_in_order_once_and_up_to_target(tmp_path):
+    _write(tmp_path, {
+        '0002_add_note.py': "def upgrade(conn):\n    conn.execute('ALTER TABLE t ADD COLUMN note TEXT')\n",
+        '0001_create.sql': 'CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT);\nINSERT INTO t (v) VALUES (\'a;b\');\n',
+        '0003_index.sql': 'CREATE INDEX idx_t_v ON t (v);',
+        'README.md': 'not a migration',
+    })
+    conn = sqlite3.connect(str(tmp_path / 'app.db'))
+    assert [m.version for m in migrate(conn, str(tmp_path), target=2)] == [1, 2]
+    assert applied_versions(conn) == {1, 2}
+    assert [m.name for m in migrate(conn, str(tmp_path))] == ['index']
+    assert migrate(conn, str(tmp_path)) == []
+    assert conn.execute('SELECT v, note FROM t').fetchall() == [('a;b', None)]
+
+def test_failed_sql_migration_leaves_nothing_behind(tmp_path):
+    _write(tmp_path, {'0001_broken.sql': 'CREATE TABLE t (id INTEGER);\nINSERT INTO missing VALUES (1);\n'})
+    conn = sqlite3.connect(str(tmp_path / 'app.db'))
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(conn, str(tmp_path))
+    assert applied_versions(conn) == set()
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 't'").fetchone() is None
+
+def test_duplicate_versions_rejected(tmp_path):
+    _write(tmp_path, {'0001_a.sql': 'SELECT 1;', '1_b.sql': 'SELECT 1;'})
+    with pytest.raises(ValueError):
+        discover(str(tmp_path))
+
+def test_split_keeps_trigger_bodies_whole():
+    script = ('CREATE TABLE a (x); CREATE TABLE b (x);\n'
+              'CREATE TRIGGER tr AFTER INSERT ON a BEGIN INSERT INTO b VALUES (NEW.x); DELETE FROM b WHERE x < 0; END;')
+    assert len(split_statements(script)) == 3
+
+def test_create_index_online_reads_in_batches_then_builds(tmp_path):
+    path = str(tmp_path / 'app.db')
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, user_id TEXT, ts TEXT)')
+    conn.executemany('INSERT INTO t (user_id, ts) VALUES (?, ?)', [(f'u{i % 7}', f'2024-01-{i % 28 + 1:02d}') for i in range(1000)])
+    held = create_index_online(conn, 'idx_t_user_ts', 't', ['user_id', 'ts'], batch_size=64)
+    assert held > 0 and index_exists(conn, 'idx_t_user_ts')
+    assert create_index_online(conn, 'idx_t_user_ts', 't', ['user_id', 'ts']) == 0.0
+    plan = conn.execute("EXPLAIN QUERY PLAN SELECT ts FROM t WHERE user_id = 'u3' AND ts >= '2024-01-10'").fetchall()
+    assert 'idx_t_user_ts' in str(plan)
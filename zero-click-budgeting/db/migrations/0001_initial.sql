@@ -11,4 +11,4 @@ CREATE TABLE IF NOT EXISTS budgets (
   user_id TEXT PRIMARY KEY,
   monthly_limit REAL,
   config TEXT
-);
\ No newline at end of file
+);
@@ -0,0 +1,9 @@
+"""Event log sequence number on webhook rows, unique so a redelivered event is stored once."""
+from sqlite_migrations import create_index_online
+
+
+def upgrade(conn):
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(transactions)')}
+    if 'event_seq' not in columns:
+        conn.execute('ALTER TABLE transactions ADD COLUMN event_seq INTEGER')
+    create_index_online(conn, 'idx_transactions_event_seq', 'transactions', ['event_seq'], unique=True)
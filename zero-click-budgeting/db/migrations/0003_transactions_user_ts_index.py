@@ -0,0 +1,6 @@
+"""One user's transactions in time order, for per-user range reads and spend sums."""
+from sqlite_migrations import create_index_online
+
+
+def upgrade(conn):
+    create_index_online(conn, 'idx_transactions_user_ts', 'transactions', ['user_id', 'ts'])
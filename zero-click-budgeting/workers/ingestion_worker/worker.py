@@ -1,10 +1,57 @@
-import time
+import logging
+import os
+import signal
+import sys
+import threading
 
-def run():
-    print('ingestion worker started')
-    while True:
-        # TODO: pull events from API/event bus and store to DB
-        time.sleep(5)
+# Ensure budget-engine is importable
+CUR_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CUR_DIR, "..", ".."))
+ENGINE_SRC = os.path.join(PROJECT_ROOT, "budget-engine", "src")
+if ENGINE_SRC not in sys.path:
+    sys.path.insert(0, ENGINE_SRC)
+
+from budget_engine import GaugeAggregate  # type: ignore
+from ingest_queue import drain, open_queue  # type: ignore
+from repository import BudgetRepository, sqlite_path  # type: ignore
+
+log = logging.getLogger('ingestion_worker')
+
+BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '500'))
+DB_URL = os.getenv('DB_URL', 'sqlite:///data/zero_click.db')
+DEFAULT_USER_ID = os.getenv('DEFAULT_USER_ID', 'demo')
+
+
+def run(queue_spec=None, batch_size=BATCH_SIZE, db_url=DB_URL):
+    """Drain a shared (sqlite:<path>) ingest queue in batches until SIGINT/SIGTERM.
+
+    Run the API with INGEST_WORKER=external and the same INGEST_QUEUE and
+    DB_URL so webhooks only enqueue and this process stores the transactions.
+    An in-memory queue could never receive the API's events, so anything but
+    a sqlite: spec is rejected with ValueError before the worker starts.
+    """
+    queue_spec = queue_spec or os.getenv('INGEST_QUEUE', '')
+    if not queue_spec.startswith('sqlite:'):
+        raise ValueError(f"the ingestion worker needs a shared queue: set INGEST_QUEUE=sqlite:<path>, got {queue_spec!r}")
+    q = open_queue(queue_spec)
+    repo = BudgetRepository(sqlite_path(db_url, PROJECT_ROOT))
+    gauge = GaugeAggregate()
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    def handle(events):
+        # events redelivered after a crash keep their event log seq and are skipped
+        stored = repo.add_transactions(events, DEFAULT_USER_ID)
+        for tx in events:
+            gauge.add(tx)
+        log.info('ingested %d events (%d stored, total %d, spend %.2f, queue depth %d)',
+                 len(events), stored, gauge.count, gauge.total, q.depth())
+
+    log.info('ingestion worker started on %s', queue_spec)
+    drain(q, handle, batch_size=batch_size, stop=stop)
+    log.info('ingestion worker stopped')
 
 if __name__ == '__main__':
-    run()
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(message)s')
+    run()
@@ -1,11 +1,14 @@
-import re
+import os
+import sys
+
+# Read SMS with the parser shared by the other services
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from insights.utils import sms_parser  # type: ignore
+
 
 def parse_sms(text: str) -> dict:
-    r = { 'raw': text, 'amount': None, 'merchant': None, 'method': None }
-    m = re.search(r'(\d+[\.,]?\d*)', text)
-    if m: r['amount'] = float(m.group(1).replace(',', ''))
-    low = text.lower()
-    if 'upi' in low: r['method'] = 'UPI'
-    for t in ['amazon','zomato','uber','ola','swiggy','myntra','flipkart']:
-        if t in low: r['merchant'] = t.title(); break
-    return r
\ No newline at end of file
+    tx = sms_parser.parse_sms(text)
+    return { 'raw': text, 'amount': tx['amount'], 'merchant': tx['merchant'], 'method': tx['method'] }